@@ -2,17 +2,40 @@ import tkinter as tk
 from tkinter import filedialog, ttk
 from tkinter import messagebox
 import os
-import tempfile
-from urllib.request import urlretrieve
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlparse
 from bs4 import BeautifulSoup
-import shutil
+from lxml import etree, html as lxml_html
 from PIL import Image, ImageTk
 import datetime
 import threading
+import sys
+import argparse
+import glob
+import time
+import json
+import re
+import queue
+from collections import OrderedDict
+import hashlib
+import sqlite3
+import zlib
+import base64
+import io
+from dataclasses import dataclass, field
+from enum import Enum
+from html import escape as html_escape
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # Global variable for output directory, defaulting to user's Downloads folder
 output_dir = os.path.expanduser("~/Downloads")
 
+# Directory for data kept between sessions, such as the parse cache and
+# downloaded icons
+cache_dir = os.path.expanduser("~/.ada_converter")
+icon_cache_dir = os.path.join(cache_dir, 'icons')
+
 # Template HTML and CSS as strings
 template_html = '''
 <!DOCTYPE html>
@@ -135,20 +158,38 @@ template_html = '''
         });
         // Tile toggling functionality
         let currentExpandedTile = null;
+        let trappedLinks = []; // First and last visible link of the innermost open section, which carry the focus trap
         // Handles shift-tab on first link in expanded tile
         function handleFirstLinkShiftTab(event) {
-            if (event.key === 'Tab' && event.shiftKey) {
+            if (event.key === 'Tab' && event.shiftKey && currentExpandedTile) {
                 event.preventDefault();
                 currentExpandedTile.focus();
             }
         }
         // Handles tab on last link in expanded tile
         function handleLastLinkTab(event) {
-            if (event.key === 'Tab' && !event.shiftKey) {
+            if (event.key === 'Tab' && !event.shiftKey && currentExpandedTile) {
                 event.preventDefault();
                 currentExpandedTile.focus();
             }
         }
+        // Moves the focus trap to the section of the given tile (or removes it); links inside collapsed nested sections are skipped
+        function setFocusTrap(tile) {
+            if (trappedLinks.length > 0) {
+                trappedLinks[0].removeEventListener('keydown', handleFirstLinkShiftTab);
+                trappedLinks[1].removeEventListener('keydown', handleLastLinkTab);
+            }
+            trappedLinks = [];
+            currentExpandedTile = tile;
+            if (!tile) return;
+            const links = Array.from(document.getElementById(tile.dataset.section).querySelectorAll('.tile-link'))
+                .filter(link => link.offsetParent !== null);
+            if (links.length > 0) {
+                trappedLinks = [links[0], links[links.length - 1]];
+                trappedLinks[0].addEventListener('keydown', handleFirstLinkShiftTab);
+                trappedLinks[1].addEventListener('keydown', handleLastLinkTab);
+            }
+        }
         // Toggles visibility of a tile section
         function toggleSection(sectionId, tile) {
             const section = document.getElementById(sectionId);
@@ -156,17 +197,15 @@ template_html = '''
             const tileText = tile.querySelector('.tile-text').textContent;
             const isActive = tileElement.classList.contains('active');
             document.querySelectorAll('.navigation-tile').forEach(t => {
+                // Tiles whose section encloses this one stay open, so nested sections expand inside their parent
+                if (t !== tile && document.getElementById(t.dataset.section).contains(section)) return;
                 t.querySelector('.tile').classList.remove('active');
                 t.setAttribute('aria-expanded', 'false');
             });
             document.querySelectorAll('.tile-group').forEach(group => {
+                if (group !== section && group.contains(section)) return;
                 group.classList.remove('active');
                 group.style.display = 'none';
-                const links = group.querySelectorAll('.tile-link');
-                if (links.length > 0) {
-                    links[0].removeEventListener('keydown', handleFirstLinkShiftTab);
-                    links[links.length - 1].removeEventListener('keydown', handleLastLinkTab);
-                }
             });
             if (!isActive) {
                 tileElement.classList.add('active');
@@ -174,15 +213,13 @@ template_html = '''
                 section.classList.add('active');
                 section.style.display = 'block';
                 statusMessage.textContent = `${tileText} has been expanded`;
-                const links = section.querySelectorAll('.tile-link');
-                if (links.length > 0) {
-                    links[0].addEventListener('keydown', handleFirstLinkShiftTab);
-                    links[links.length - 1].addEventListener('keydown', handleLastLinkTab);
-                }
-                currentExpandedTile = tile;
+                setFocusTrap(tile);
             } else {
                 statusMessage.textContent = `${tileText} collapsed`;
-                currentExpandedTile = null;
+                // Collapsing a nested section hands the trap back to the section that encloses it
+                const parentSection = section.parentElement.closest('.tile-group');
+                const parentTile = parentSection ? Array.from(document.querySelectorAll('.navigation-tile')).find(t => t.dataset.section === parentSection.id) : null;
+                setFocusTrap(parentTile || null);
             }
         }
         // Handles keydown events for tile navigation
@@ -699,55 +736,345 @@ body {
 }
 '''
 
+# Prefix of campusM links that point at another pocket-guide page
+POCKETGUIDE_PREFIX = 'campusm://pocketguide?pg_code='
+
 # Global variables for application state
+root = None # Stays None when running headless in batch mode
 parsed_data = None
-temp_dir = None
-photos = []
+main_file_path = None # Saved file parsed_data came from; sub-pages are looked up next to it
+THUMBNAIL_CACHE_SIZE = 256 # Resized PIL images kept in memory, keyed by (source path, target size)
+thumbnail_cache = OrderedDict()
+thumbnail_lock = threading.Lock()
+photo_refs = {} # (source path, target size) -> [PhotoImage, number of labels showing it]
+IMAGE_DECODE_WORKERS = 2 # Threads that decode and resize icons, independent of page size
+IMAGE_POLL_MS = 30 # How often the Tk loop collects decoded images
+image_executor = None
+image_results = queue.Queue() # Decoded thumbnails and errors waiting for the Tk thread
 active_labels = [] # Track active labels to prevent updating destroyed widgets
-sub_buttons = {}
+preview_state = {} # Widgets of the current preview keyed by role, so build_preview can patch instead of rebuilding
+VIRTUAL_ROW_HEIGHT = 16 # Pixel height of one row in a virtualized link list
+VIRTUAL_LIST_MAX_ROWS = 25 # Rows shown at once; longer lists scroll inside their own viewport
+VIRTUAL_SCROLL_ROWS = 3 # Rows moved per mouse wheel step
+VIRTUAL_TILE_ROWS = 6 # Tile rows shown at once; bigger tile grids scroll inside their own viewport
+sub_buttons = {} # Tile ID -> the tile's label, menu and text widgets in the upload panel
 add_text = None
-image_cache = {}
+image_cache = {} # URLs already validated against the server this session
+icon_cache_max_bytes = 100 * 1024 * 1024 # Disk budget for cached icons before least recently used ones are evicted
+icon_cache_local = threading.local() # One SQLite connection per thread for the icon index
+ICON_FETCH_WORKERS = 6 # Upper bound on concurrent icon downloads
+icon_executor = None
+icon_futures = {} # URL -> Future for downloads that are queued, running or finished
+icon_lock = threading.Lock()
+page_store = None # PageStore shared by the GUI, or handed to each batch worker process
+SAVED_PG_MAP_NAME = 'pg_map.json' # pg_code -> file name, written by HTMLSaverwlabel
+SUB_PAGE_WORKERS = 4 # Sub-pages of one main page parsed at the same time
+sub_page_executor = None
+compiled_templates = {} # Asset mode -> template skeleton built once by compile_template()
+compiled_assets = None # Minified CSS and JS with their content-hashed file names, built once by compile_assets()
+ASSET_MODES = ('inline', 'external') # Minified CSS/JS inside every page, or shared styles.<hash>.css / app.<hash>.js files
+asset_mode = 'inline'
+critical_css = False # Inline only the CSS rules a page can use and load the full stylesheet without blocking first paint
+compiled_css_rules = None # Parsed stylesheet with what each rule needs to match, built once by compile_css_rules()
+critical_css_cache = {} # (classes, tags) on a page -> its critical CSS, shared by pages with the same markup vocabulary
+IMAGE_FORMATS = ('webp', 'png')
+optimize_images = None # Format exported images are resized and re-encoded to, or None to link the original URLs
+image_out_dir = None # Output directory for optimized images too large to inline
+optimized_images = {} # Image URL -> (src, width, height) written for the current output directory
+ICON_SIZE = 45 # CSS pixel size of a tile icon
+BANNER_MAX_WIDTH = 1200 # Widest the banner is ever shown, the .main max-width
+IMAGE_PIXEL_RATIO = 2 # Icons are encoded at twice their CSS size so they stay sharp on high-density screens
+INLINE_IMAGE_MAX_BYTES = 4096 # Encoded images up to this size become data URIs instead of files
+TEMPLATE_SLOT = '@@ada-slot-{}@@'
+RENDER_VERSION = 2 # Bump whenever render_page output changes so incremental batch runs rebuild every page
+MANIFEST_NAME = '.ada_manifest.json' # Build manifest kept in each batch output directory
+PARSER_VERSION = 3 # Bump whenever parse_page output changes so cached results are not reused
+parse_cache_enabled = True
+parse_cache_max_bytes = 64 * 1024 * 1024 # Compressed size budget before least recently used pages are evicted
+parse_cache_local = threading.local() # One SQLite connection per thread
+
+# Gives each tile its position as a stable ID, so tiles are found by index
+# instead of by their (possibly repeated) text
+def number_tiles(tiles):
+    for tile_id, tile in enumerate(tiles):
+        tile.tile_id = tile_id
+
+# How a pocket-guide tile is exported; members are singletons, so modes compare
+# by identity and are never copied per tile
+class TileMode(str, Enum):
+    TILES = 'tiles'
+    LIST = 'list'
+    TEXT_ONLY = 'text_only'
+    DIRECT = 'direct'
+
+# Tiles and layout of a sub-page that has been attached to a main page tile
+@dataclass(slots=True)
+class SubPage:
+    title: str
+    tiles: list
+    is_list: bool = False
+
+    def __post_init__(self):
+        number_tiles(self.tiles)
+
+    # Packs the sub-page into plain lists for the parse cache
+    def to_data(self):
+        return [self.title, self.is_list, [tile.to_data() for tile in self.tiles]]
+
+    @classmethod
+    def from_data(cls, data):
+        title, is_list, tiles = data
+        return cls(title, [Tile.from_data(tile) for tile in tiles], is_list)
+
+# One navigation tile or list link, plus the choices made for it in the GUI or
+# by batch resolution
+@dataclass(slots=True)
+class Tile:
+    text: str
+    icon: str = ''
+    href: str = '#'
+    mode: TileMode = TileMode.TILES
+    use_direct: bool = False
+    sub_add_text: str = ''
+    sub_page: SubPage = None
+    tile_id: int = -1 # Position within its page, assigned by the page; stays valid when labels repeat
+
+    @property
+    def sub_tiles(self):
+        return self.sub_page.tiles if self.sub_page is not None else None
+
+    @property
+    def sub_is_list(self):
+        return self.sub_page is not None and self.sub_page.is_list
+
+    # True for a pocket-guide tile exported as a button that expands its
+    # sub-tiles or text
+    @property
+    def opens_section(self):
+        return self.href.startswith(POCKETGUIDE_PREFIX) and not self.use_direct and bool(self.sub_tiles or self.mode == TileMode.TEXT_ONLY)
+
+    # True for a pocket-guide tile that still needs a sub-page, direct link or
+    # text-only choice before export
+    @property
+    def is_pending(self):
+        return self.href.startswith(POCKETGUIDE_PREFIX) and not (self.use_direct or self.sub_page is not None or self.mode == TileMode.TEXT_ONLY)
+
+    # Packs the tile into a plain list for the parse cache in from_data's order
+    def to_data(self):
+        return [self.text, self.icon, self.href, self.mode.value, self.use_direct, self.sub_add_text,
+                self.sub_page.to_data() if self.sub_page is not None else None]
+
+    @classmethod
+    def from_data(cls, data):
+        text, icon, href, mode, use_direct, sub_add_text, sub_page = data
+        return cls(text, icon, href, TileMode(mode), use_direct, sub_add_text,
+                   SubPage.from_data(sub_page) if sub_page is not None else None)
+
+# Everything the converter keeps from a parsed pocket-guide page
+@dataclass(slots=True)
+class Page:
+    title: str
+    top_img: str = None
+    tiles: list = field(default_factory=list)
+    is_list_page: bool = False
+    welcome: str = ''
+    location: str = ''
+    pending: set = field(default_factory=set, repr=False, compare=False) # IDs of tiles whose is_pending is True
+
+    def __post_init__(self):
+        number_tiles(self.tiles)
+        self.pending = {tile.tile_id for tile in self.tiles if tile.is_pending}
+
+    # Re-checks one tile after its mode, direct flag or sub-page changed,
+    # keeping the pending set current without rescanning the page
+    def update_pending(self, tile):
+        if tile.is_pending:
+            self.pending.add(tile.tile_id)
+        else:
+            self.pending.discard(tile.tile_id)
+
+    # Returns the tiles that still block export, in page order
+    def pending_tiles(self):
+        return [self.tiles[tile_id] for tile_id in sorted(self.pending)]
+
+    # Looks a tile up by the ID handed out in number_tiles
+    def tile(self, tile_id):
+        return self.tiles[tile_id]
+
+    # Packs the page into plain lists for the parse cache
+    def to_data(self):
+        return [self.title, self.top_img, self.is_list_page, self.welcome, self.location, [tile.to_data() for tile in self.tiles]]
+
+    @classmethod
+    def from_data(cls, data):
+        title, top_img, is_list_page, welcome, location, tiles = data
+        return cls(title, top_img, [Tile.from_data(tile) for tile in tiles], is_list_page, welcome, location)
+
+# Parses HTML content with BeautifulSoup; kept as the reference for
+# extract_page and as its fallback
+def parse_page_soup(html_content):
+    soup = BeautifulSoup(html_content, 'lxml')
+    title_div = soup.find('div', class_='sectiontext')
+    title = title_div.text.strip() if title_div else 'Untitled'
+    top_img = soup.find('img', class_='w3-image w3-width-100')
+    top_img_src = top_img['src'] if top_img else None
+    welcome = ''
+    location_text = ''
+    tiles = []
+    for child in soup.find_all('div', class_='child w3-card tile'):
+        a = child.find('a')
+        if a:
+            href = a.get('href', '#')
+            img = a.find('img')  # Changed to find any <img> tag within the <a> element
+            icon_src = img['src'] if img else ''
+            tile_text_div = a.find('div', class_='tiletext')
+            text = tile_text_div.text.strip() if tile_text_div else ''
+            tiles.append(Tile(text, icon_src, href))
+    is_list_page = False
+    if not tiles:
+        header = soup.find('div', class_='exlheader')
+        if header:
+            title_b = header.find('b')
+            title = title_b.text.strip() if title_b else 'Untitled'
+            top_img_src = None
+            links = soup.find_all('a', class_='exllink')
+            for a in links:
+                text = a.text.strip()
+                if text:
+                    href = a.get('href', '#')
+                    tiles.append(Tile(text, None, href, TileMode.LIST))
+            is_list_page = True
+    return Page(title, top_img_src, tiles, is_list_page, welcome, location_text)
+
+# Builds an XPath test matching BeautifulSoup's class_ semantics: one token
+# anywhere in the class list, or the exact (whitespace-normalized) class string
+def class_test(class_name):
+    if ' ' in class_name:
+        return f"normalize-space(@class)='{class_name}'"
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+# Precompiled selectors for the only elements parse_page needs
+XPATH_SECTION_TEXT = etree.XPath(f"(//div[{class_test('sectiontext')}])[1]")
+XPATH_TOP_IMG = etree.XPath(f"(//img[{class_test('w3-image w3-width-100')}])[1]")
+XPATH_TILES = etree.XPath(f"//div[{class_test('child w3-card tile')}]")
+XPATH_FIRST_A = etree.XPath("(.//a)[1]")
+XPATH_FIRST_IMG = etree.XPath("(.//img)[1]")
+XPATH_TILE_TEXT = etree.XPath(f"(.//div[{class_test('tiletext')}])[1]")
+XPATH_EXL_HEADER = etree.XPath(f"(//div[{class_test('exlheader')}])[1]")
+XPATH_FIRST_B = etree.XPath("(.//b)[1]")
+XPATH_EXL_LINKS = etree.XPath(f"//a[{class_test('exllink')}]")
+# BeautifulSoup's .text skips strings that live inside script, style, template
+# and ruby annotation tags
+XPATH_STRINGS = etree.XPath(".//text()[not(ancestor::script or ancestor::style or ancestor::template or ancestor::rt or ancestor::rp)]")
+
+# Returns the first match of a precompiled selector, or None
+def first_match(xpath, node):
+    matches = xpath(node)
+    return matches[0] if matches else None
+
+# Returns the stripped text of an element, as BeautifulSoup's .text.strip()
+def node_text(node):
+    return ''.join(XPATH_STRINGS(node)).strip()
+
+# Extracts the same Page as parse_page_soup straight from an lxml tree, without
+# building a BeautifulSoup tree
+def extract_page(doc):
+    title_div = first_match(XPATH_SECTION_TEXT, doc)
+    title = node_text(title_div) if title_div is not None else 'Untitled'
+    top_img = first_match(XPATH_TOP_IMG, doc)
+    top_img_src = top_img.attrib['src'] if top_img is not None else None
+    welcome = ''
+    location_text = ''
+    tiles = []
+    for child in XPATH_TILES(doc):
+        a = first_match(XPATH_FIRST_A, child)
+        if a is not None:
+            href = a.get('href', '#')
+            img = first_match(XPATH_FIRST_IMG, a)
+            icon_src = img.attrib['src'] if img is not None else ''
+            tile_text_div = first_match(XPATH_TILE_TEXT, a)
+            text = node_text(tile_text_div) if tile_text_div is not None else ''
+            tiles.append(Tile(text, icon_src, href))
+    is_list_page = False
+    if not tiles:
+        header = first_match(XPATH_EXL_HEADER, doc)
+        if header is not None:
+            title_b = first_match(XPATH_FIRST_B, header)
+            title = node_text(title_b) if title_b is not None else 'Untitled'
+            top_img_src = None
+            for a in XPATH_EXL_LINKS(doc):
+                text = node_text(a)
+                if text:
+                    href = a.get('href', '#')
+                    tiles.append(Tile(text, None, href, TileMode.LIST))
+            is_list_page = True
+    return Page(title, top_img_src, tiles, is_list_page, welcome, location_text)
 
 # Parses HTML content to extract title, images, and tile information
 def parse_page(html_content):
     try:
-        soup = BeautifulSoup(html_content, 'lxml')
-        title_div = soup.find('div', class_='sectiontext')
-        title = title_div.text.strip() if title_div else 'Untitled'
-        top_img = soup.find('img', class_='w3-image w3-width-100')
-        top_img_src = top_img['src'] if top_img else None
-        welcome = ''
-        location_text = ''
-        tiles = []
-        for child in soup.find_all('div', class_='child w3-card tile'):
-            a = child.find('a')
-            if a:
-                href = a.get('href', '#')
-                img = a.find('img')  # Changed to find any <img> tag within the <a> element
-                icon_src = img['src'] if img else ''
-                tile_text_div = a.find('div', class_='tiletext')
-                text = tile_text_div.text.strip() if tile_text_div else ''
-                tiles.append({'text': text, 'icon': icon_src, 'href': href, 'sub_tiles': None, 'sub_add_text': '', 'use_direct': False, 'mode': 'tiles'})
-        is_list_page = False
-        if not tiles:
-            header = soup.find('div', class_='exlheader')
-            if header:
-                title_b = header.find('b')
-                title = title_b.text.strip() if title_b else 'Untitled'
-                top_img_src = None
-                links = soup.find_all('a', class_='exllink')
-                for a in links:
-                    text = a.text.strip()
-                    if text:
-                        href = a.get('href', '#')
-                        tiles.append({'text': text, 'icon': None, 'href': href, 'sub_tiles': None, 'sub_add_text': '', 'use_direct': False, 'mode': 'list'})
-                is_list_page = True
-        return {'title': title, 'welcome': welcome, 'location': location_text, 'top_img': top_img_src, 'tiles': tiles, 'is_list_page': is_list_page}
+        try:
+            doc = lxml_html.document_fromstring(html_content)
+        except (etree.ParserError, ValueError):
+            # Empty documents and strings with an XML encoding declaration are
+            # left to BeautifulSoup
+            return parse_page_soup(html_content)
+        return extract_page(doc)
     except Exception as e:
-        messagebox.showerror("Parsing Error", f"Error parsing HTML: {str(e)}")
+        if root is not None:
+            messagebox.showerror("Parsing Error", f"Error parsing HTML: {str(e)}")
         print(f"Parsing error: {str(e)}")
         return None
 
+# Returns this thread's connection to the on-disk parse cache, creating the
+# database on first use
+def open_parse_cache():
+    conn = getattr(parse_cache_local, 'conn', None)
+    if conn is None:
+        os.makedirs(cache_dir, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(cache_dir, 'parse_cache.sqlite'), timeout=30)
+        conn.execute("CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)")
+        parse_cache_local.conn = conn
+    return conn
+
+# Drops least recently used entries until the cache fits in
+# parse_cache_max_bytes
+def evict_parse_cache(conn):
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+    if total <= parse_cache_max_bytes:
+        return
+    for key, size in conn.execute("SELECT key, size FROM pages ORDER BY last_used").fetchall():
+        conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+        total -= size
+        if total <= parse_cache_max_bytes:
+            break
+
+# Parses HTML content through a cache keyed by the content hash and parser
+# version, so unchanged pages are never re-parsed
+def parse_page_cached(html_content):
+    if not parse_cache_enabled:
+        return parse_page(html_content)
+    key = hashlib.sha256(f"{PARSER_VERSION}:{html_content}".encode('utf-8', 'surrogatepass')).hexdigest()
+    try:
+        conn = open_parse_cache()
+        with conn:
+            row = conn.execute("SELECT data FROM pages WHERE key = ?", (key,)).fetchone()
+            if row:
+                conn.execute("UPDATE pages SET last_used = ? WHERE key = ?", (time.time(), key))
+                return Page.from_data(json.loads(zlib.decompress(row[0])))
+        parsed = parse_page(html_content)
+        if parsed is None: # Failures are not cached so a fixed parser gets another try
+            return None
+        data = zlib.compress(json.dumps(parsed.to_data(), separators=(',', ':')).encode('utf-8'))
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO pages (key, data, size, last_used) VALUES (?, ?, ?, ?)", (key, data, len(data), time.time()))
+            evict_parse_cache(conn)
+        return parsed
+    except sqlite3.Error as e:
+        print(f"Parse cache error: {str(e)}")
+        return parse_page(html_content)
+
 # Clears all widgets from a given frame
 def clear_frame(frame):
     for widget in frame.winfo_children():
@@ -755,144 +1082,538 @@ def clear_frame(frame):
     global active_labels
     active_labels = [] # Clear active labels when clearing frame
 
-# Downloads an image from a URL and caches it locally
+# Returns this thread's connection to the icon cache index, creating the cache
+# directory on first use
+def open_icon_index():
+    conn = getattr(icon_cache_local, 'conn', None)
+    if conn is None:
+        os.makedirs(icon_cache_dir, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(icon_cache_dir, 'index.sqlite'), timeout=30)
+        conn.execute("CREATE TABLE IF NOT EXISTS icons (url TEXT PRIMARY KEY, filename TEXT NOT NULL, etag TEXT, last_modified TEXT, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS icons_last_used ON icons (last_used)")
+        icon_cache_local.conn = conn
+    return conn
+
+# Removes least recently used icons until the cache fits in
+# icon_cache_max_bytes, never touching the icon just stored
+def evict_icon_cache(conn, keep_url):
+    # Identical bytes are stored once, so the budget counts each file once
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM icons GROUP BY filename)").fetchone()[0]
+    if total <= icon_cache_max_bytes:
+        return
+    for url, filename, size in conn.execute("SELECT url, filename, size FROM icons WHERE url != ? ORDER BY last_used", (keep_url,)).fetchall():
+        conn.execute("DELETE FROM icons WHERE url = ?", (url,))
+        image_cache.pop(url, None)
+        if conn.execute("SELECT 1 FROM icons WHERE filename = ? LIMIT 1", (filename,)).fetchone():
+            continue # Still shared by another URL
+        try:
+            os.remove(os.path.join(icon_cache_dir, filename))
+        except OSError:
+            pass
+        total -= size
+        if total <= icon_cache_max_bytes:
+            break
+
+# Writes a file through a temporary name so other converter instances never
+# read a partial icon
+def write_file_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+# Downloads an image from a URL into the persistent icon cache, revalidating
+# cached copies with a conditional GET
 def download_image(url):
     if not url:
         return None
     if url in image_cache:
         return image_cache[url]
     try:
-        filename = os.path.basename(url)
-        local_path = os.path.join(temp_dir, filename)
-        urlretrieve(url, local_path)
+        conn = open_icon_index()
+        row = conn.execute("SELECT filename, etag, last_modified FROM icons WHERE url = ?", (url,)).fetchone()
+        cached_path = os.path.join(icon_cache_dir, row[0]) if row else None
+        if cached_path and not os.path.exists(cached_path): # Evicted by another instance
+            cached_path = None
+        request = Request(url)
+        if cached_path:
+            if row[1]:
+                request.add_header('If-None-Match', row[1])
+            if row[2]:
+                request.add_header('If-Modified-Since', row[2])
+        try:
+            with urlopen(request, timeout=15) as response:
+                data = response.read()
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+        except HTTPError as e:
+            if e.code != 304 or not cached_path:
+                raise
+            with conn:
+                conn.execute("UPDATE icons SET last_used = ? WHERE url = ?", (time.time(), url))
+            image_cache[url] = cached_path
+            return cached_path
+        except (URLError, OSError) as e:
+            if not cached_path:
+                raise
+            print(f"Image revalidation failed, using cached copy: {str(e)}")
+            image_cache[url] = cached_path
+            return cached_path
+        # Files are named by a hash of their bytes: icons with the same
+        # basename in different folders never collide, and the same image
+        # served from several URLs is stored once
+        extension = os.path.splitext(urlparse(url).path)[1][:8].lower()
+        filename = hashlib.sha256(data).hexdigest() + extension
+        local_path = os.path.join(icon_cache_dir, filename)
+        if not os.path.exists(local_path):
+            write_file_atomic(local_path, data)
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO icons (url, filename, etag, last_modified, size, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                         (url, filename, etag, last_modified, len(data), time.time()))
+            # The URL now serves new bytes: its old file leaves the index with
+            # this row, so delete it unless another URL still shares it
+            if row and row[0] != filename and not conn.execute("SELECT 1 FROM icons WHERE filename = ? LIMIT 1", (row[0],)).fetchone():
+                try:
+                    os.remove(os.path.join(icon_cache_dir, row[0]))
+                except OSError:
+                    pass
+            evict_icon_cache(conn, url)
         image_cache[url] = local_path
         return local_path
     except Exception as e:
         print(f"Image download error: {str(e)}")
         return None
 
-# Loads and resizes an image asynchronously for display
+# Starts downloading an icon on the shared worker pool; concurrent requests for
+# the same URL share one download
+def fetch_icon(url):
+    global icon_executor
+    with icon_lock:
+        future = icon_futures.get(url)
+        if future is not None:
+            return future
+        if icon_executor is None:
+            icon_executor = ThreadPoolExecutor(max_workers=ICON_FETCH_WORKERS, thread_name_prefix='icon-fetch')
+        future = icon_executor.submit(download_image, url)
+        icon_futures[url] = future
+    # Registered outside the lock: a download that already finished runs the
+    # callback immediately
+    future.add_done_callback(lambda f, u=url: forget_failed_icon(u, f))
+    return future
+
+# Drops a failed or cancelled download from the in-flight table so the next
+# preview retries it; downloads cancelled by cleanup() end up here as well
+def forget_failed_icon(url, future):
+    if future.cancelled() or future.exception() is not None or future.result() is None:
+        with icon_lock:
+            if icon_futures.get(url) is future:
+                del icon_futures[url]
+
+# Collects the image URLs a parsed page shows: banner and tile icons, plus
+# sub-tile icons when asked for
+def collect_icon_urls(parsed, include_sub_tiles=True):
+    urls = []
+    if parsed.top_img:
+        urls.append(parsed.top_img)
+    for tile in parsed.tiles:
+        if tile.icon:
+            urls.append(tile.icon)
+        if include_sub_tiles:
+            for sub_tile in tile.sub_tiles or []:
+                if sub_tile.icon:
+                    urls.append(sub_tile.icon)
+    return list(dict.fromkeys(urls))
+
+# Queues all icons of a page up front so they download concurrently before the
+# preview needs them
+def prefetch_icons(urls):
+    return [fetch_icon(url) for url in urls if url]
+
+# Fills a label with an icon as soon as its download finishes
+def show_icon(url, label, size):
+    future = fetch_icon(url)
+    future.add_done_callback(lambda f: queue_decode(f.result(), label, size)
+                             if not f.cancelled() and f.exception() is None and f.result() else None)
+
+# Hands a downloaded icon to the fixed-size decode pool
+def queue_decode(local_path, label, size):
+    global image_executor
+    with icon_lock:
+        if image_executor is None:
+            image_executor = ThreadPoolExecutor(max_workers=IMAGE_DECODE_WORKERS, thread_name_prefix='image-decode')
+    image_executor.submit(load_image_async, local_path, label, size)
+
+# Returns the decoded, resized image for (path, size); decodes on a cache miss
+def get_thumbnail(local_path, size):
+    key = (local_path, size)
+    with thumbnail_lock:
+        thumb = thumbnail_cache.get(key)
+        if thumb is not None:
+            thumbnail_cache.move_to_end(key)
+            return thumb
+    with Image.open(local_path) as img:
+        thumb = img.resize(size if size is not None else img.size, Image.NEAREST)
+    with thumbnail_lock:
+        thumbnail_cache[key] = thumb
+        while len(thumbnail_cache) > THUMBNAIL_CACHE_SIZE:
+            thumbnail_cache.popitem(last=False)
+    return thumb
+
+# Shows a thumbnail on a label, sharing one PhotoImage between all labels with
+# the same image and size
+def attach_photo(label, key, thumb):
+    if not label.winfo_exists(): # Check if label still exists
+        return
+    entry = photo_refs.get(key)
+    if entry is None:
+        entry = photo_refs[key] = [ImageTk.PhotoImage(thumb), 0]
+    entry[1] += 1
+    label.config(image=entry[0])
+    label.bind('<Destroy>', lambda e, k=key: release_photo(k), add='+')
+
+# Drops a label's reference to a shared PhotoImage and frees the image once no
+# label shows it
+def release_photo(key):
+    entry = photo_refs.get(key)
+    if entry is None:
+        return
+    entry[1] -= 1
+    if entry[1] <= 0:
+        del photo_refs[key]
+
+# Loads and resizes an image on a decode worker; the result goes through
+# image_results because workers never touch Tk
 def load_image_async(local_path, label, size):
     try:
-        img = Image.open(local_path)
-        if size is None:
-            size = img.size
-        resized_img = img.resize(size, Image.NEAREST)
-        photo = ImageTk.PhotoImage(resized_img)
-        photos.append(photo)
-        if label.winfo_exists(): # Check if label still exists
-            root.after(0, lambda: label.config(image=photo) if label.winfo_exists() else None)
+        thumb = get_thumbnail(local_path, size)
+        image_results.put((label, (local_path, size), thumb, None))
     except Exception as e:
         print(f"Image load error: {str(e)}")
-        messagebox.showwarning("Image Error", f"Failed to load image: {str(e)}")
+        image_results.put((label, None, None, str(e)))
+
+# Runs on the Tk loop: applies every decoded image waiting in the queue, then
+# schedules the next poll
+def poll_image_results():
+    try:
+        while True:
+            label, key, thumb, error = image_results.get_nowait()
+            if error:
+                messagebox.showwarning("Image Error", f"Failed to load image: {error}")
+            else:
+                attach_photo(label, key, thumb)
+    except queue.Empty:
+        pass
+    root.after(IMAGE_POLL_MS, poll_image_results)
+
+# Returns the tile fields its preview widgets depend on; tiles are only rebuilt
+# when this changes
+def tile_signature(tile):
+    sub_tiles = tile.sub_tiles
+    return (tile.text, tile.icon, tile.href, tile.use_direct, tile.mode, tile.sub_add_text,
+            tuple((sub_tile.text, sub_tile.icon) for sub_tile in sub_tiles) if sub_tiles else sub_tiles)
 
-# Builds a preview of the parsed HTML content in the GUI
+# Shows or hides a tile's sub-tile panel below the tile grid
+def toggle_sub_frame(sub_frame, tiles_frame):
+    if sub_frame.winfo_ismapped():
+        sub_frame.pack_forget()
+    else:
+        sub_frame.pack(after=tiles_frame, fill=tk.X, pady=2)
+
+# Creates a collapsed panel's widgets (and starts its icon fetches) only when
+# it is first needed
+def ensure_sub_panel(entry):
+    if entry['sub_frame'] is None:
+        entry['sub_frame'] = ttk.Frame(preview_frame, borderwidth=2, relief='sunken')
+        entry['fill_panel'](entry['sub_frame'])
+    return entry['sub_frame']
+
+# Toggles a tile's sub-tile panel, building it on the first expand
+def toggle_sub_panel(entry, tiles_frame):
+    toggle_sub_frame(ensure_sub_panel(entry), tiles_frame)
+
+# Fills the intro area with the banner image and the additional text lines
+def fill_preview_intro(intro_frame, parsed, additional_text):
+    for widget in intro_frame.winfo_children():
+        widget.destroy()
+    if parsed.top_img:
+        img_label = ttk.Label(intro_frame)
+        img_label.pack()
+        active_labels.append(img_label) # Track label
+        show_icon(parsed.top_img, img_label, None)
+    if additional_text:
+        add_lines = additional_text.split('\n')
+        for line in add_lines:
+            if line.strip():
+                add_label = ttk.Label(intro_frame, text=line.strip(), justify=tk.LEFT, wraplength=300, font=('Verdana', 8))
+                add_label.pack(anchor=tk.W)
+
+# Fills a frame with a virtualized link list, used for list pages and list-mode
+# sub-pages. Only the rows in view get labels, and those labels are reused
+# while scrolling, so widget count stays flat.
+def fill_preview_list(list_frame, tiles):
+    for widget in list_frame.winfo_children():
+        widget.destroy()
+    if not tiles:
+        return
+    visible = min(len(tiles), VIRTUAL_LIST_MAX_ROWS)
+    canvas = tk.Canvas(list_frame, height=visible * VIRTUAL_ROW_HEIGHT, highlightthickness=0, borderwidth=0)
+    canvas.pack(side=tk.LEFT, fill=tk.X, expand=True)
+    state = {'tiles': tiles, 'first': 0, 'labels': [], 'scrollbar': None}
+    for i in range(visible):
+        label = ttk.Label(canvas, font=('Verdana', 6), anchor=tk.W)
+        label.place(x=0, y=i * VIRTUAL_ROW_HEIGHT, relwidth=1.0, height=VIRTUAL_ROW_HEIGHT)
+        state['labels'].append(label)
+    if len(tiles) > visible:
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=lambda *args: scroll_virtual_list(state, *args))
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        state['scrollbar'] = scrollbar
+        for widget in [canvas] + state['labels']:
+            widget.bind('<MouseWheel>', lambda e: scroll_virtual_list(state, 'scroll', -1 if e.delta > 0 else 1, 'units'))
+            widget.bind('<Button-4>', lambda e: scroll_virtual_list(state, 'scroll', -1, 'units'))
+            widget.bind('<Button-5>', lambda e: scroll_virtual_list(state, 'scroll', 1, 'units'))
+    show_virtual_rows(state, 0)
+
+# Points the recycled row labels of a virtual list at the rows from index first
+def show_virtual_rows(state, first):
+    total = len(state['tiles'])
+    visible = len(state['labels'])
+    first = max(0, min(first, total - visible))
+    state['first'] = first
+    for i, label in enumerate(state['labels']):
+        label.config(text=state['tiles'][first + i].text)
+    if state['scrollbar'] is not None:
+        state['scrollbar'].set(first / total, (first + visible) / total)
+
+# Handles scrollbar commands and mouse wheel events for a virtual list; 'break'
+# keeps the preview itself from scrolling too
+def scroll_virtual_list(state, action, amount, unit=None):
+    if action == 'moveto':
+        first = round(float(amount) * len(state['tiles']))
+    else:
+        step = len(state['labels']) if unit == 'pages' else VIRTUAL_SCROLL_ROWS
+        first = state['first'] + int(amount) * step
+    if first != state['first']:
+        show_virtual_rows(state, first)
+    return 'break'
+
+# Scrolls the preview canvas with the mouse wheel while the pointer is over it
+def scroll_preview(event):
+    if not str(event.widget).startswith(str(preview_canvas)):
+        return
+    if event.num == 4 or getattr(event, 'delta', 0) > 0:
+        preview_canvas.yview_scroll(-1, 'units')
+    else:
+        preview_canvas.yview_scroll(1, 'units')
+
+# Fills a pocket-guide tile's sub-tile panel with its extra text and sub-tiles
+def fill_sub_panel(sub_frame, tile):
+    if tile.mode == TileMode.TEXT_ONLY or tile.sub_tiles:
+        if tile.sub_add_text:
+            sub_add_label = ttk.Label(sub_frame, text=tile.sub_add_text, justify=tk.LEFT, wraplength=300, font=('Verdana', 8))
+            sub_add_label.pack(anchor=tk.CENTER, pady=2)
+        if tile.sub_tiles: # Only add sub-tiles if not text_only (which sets sub_tiles=None)
+            if tile.mode == TileMode.LIST:
+                list_frame = ttk.Frame(sub_frame)
+                list_frame.pack(fill=tk.X, padx=2, pady=2)
+                fill_preview_list(list_frame, tile.sub_tiles)
+            else:
+                sub_tiles_frame = ttk.Frame(sub_frame)
+                sub_tiles_frame.pack(fill=tk.X, padx=2, pady=2)
+                sub_row_frame = None
+                sub_col = 0
+                for sub_tile in tile.sub_tiles:
+                    if sub_col == 0:
+                        sub_row_frame = ttk.Frame(sub_tiles_frame)
+                        sub_row_frame.pack(fill=tk.X, pady=1)
+                    sub_tile_frame = ttk.Frame(sub_row_frame, borderwidth=1, relief='ridge', width=60, height=70)
+                    sub_tile_frame.pack(side=tk.LEFT, padx=2, pady=2, expand=True, fill=tk.X)
+                    if sub_tile.icon:
+                        sub_icon = ttk.Label(sub_tile_frame)
+                        sub_icon.pack()
+                        active_labels.append(sub_icon) # Track label
+                        show_icon(sub_tile.icon, sub_icon, (25, 25))
+                    sub_text = ttk.Label(sub_tile_frame, text=sub_tile.text, font=('Verdana', 6), wraplength=50)
+                    sub_text.pack()
+                    sub_col += 1
+                    if sub_col >= 3:
+                        sub_col = 0
+
+# (Re)builds the widgets of one preview tile in place, keeping its grid cell
+# and whether its panel was open
+def fill_preview_tile(entry, tile, tiles_frame):
+    tile_frame = entry['frame']
+    for widget in tile_frame.winfo_children():
+        widget.destroy()
+    if tile.icon:
+        icon_label = ttk.Label(tile_frame)
+        icon_label.pack()
+        active_labels.append(icon_label) # Track label
+        show_icon(tile.icon, icon_label, (35, 35))
+    text_label = ttk.Label(tile_frame, text=tile.text, font=('Verdana', 7, 'bold'), wraplength=70)
+    text_label.pack()
+    old_sub_frame = entry['sub_frame']
+    entry['sub_frame'] = None
+    entry['fill_panel'] = lambda sub_frame, t=tile: fill_sub_panel(sub_frame, t)
+    if tile.href.startswith(POCKETGUIDE_PREFIX) and not tile.use_direct:
+        # Collapsed panels are built lazily; one that is open right now is
+        # rebuilt in place
+        if old_sub_frame is not None and old_sub_frame.winfo_ismapped():
+            ensure_sub_panel(entry).pack(after=old_sub_frame, fill=tk.X, pady=2)
+        tile_frame.bind('<Button-1>', lambda e: toggle_sub_panel(entry, tiles_frame))
+    else:
+        tile_frame.unbind('<Button-1>')
+    if old_sub_frame is not None:
+        old_sub_frame.destroy()
+    if preview_state.get('tile_scrollbar') is not None:
+        for widget in [tile_frame] + tile_frame.winfo_children():
+            bind_tile_grid_wheel(widget)
+    entry['signature'] = tile_signature(tile)
+
+# Makes mouse wheel events over a widget scroll the virtual tile grid alone
+def bind_tile_grid_wheel(widget):
+    widget.bind('<MouseWheel>', lambda e: scroll_tile_grid('scroll', -1 if e.delta > 0 else 1, 'units'))
+    widget.bind('<Button-4>', lambda e: scroll_tile_grid('scroll', -1, 'units'))
+    widget.bind('<Button-5>', lambda e: scroll_tile_grid('scroll', 1, 'units'))
+
+# Points the recycled tile frames of the preview grid at the tile rows
+# starting from row first and fills them
+def show_tile_rows(first):
+    tiles = preview_state['page'].tiles
+    slots = preview_state['tile_slots']
+    total_rows = (len(tiles) + 2) // 3
+    visible_rows = (len(slots) + 2) // 3
+    first = max(0, min(first, total_rows - visible_rows))
+    preview_state['tile_first'] = first
+    for entry in preview_state['slot_entries']:
+        if entry is not None:
+            entry['frame'] = None
+            entry['signature'] = None
+    for i, tile_frame in enumerate(slots):
+        index = first * 3 + i
+        if index < len(tiles):
+            entry = preview_state['tiles'][index]
+            entry['frame'] = tile_frame
+            preview_state['slot_entries'][i] = entry
+            fill_preview_tile(entry, tiles[index], preview_state['tiles_frame'])
+        else:
+            preview_state['slot_entries'][i] = None
+            for widget in tile_frame.winfo_children():
+                widget.destroy()
+            tile_frame.unbind('<Button-1>')
+    if preview_state['tile_scrollbar'] is not None:
+        preview_state['tile_scrollbar'].set(first / total_rows, (first + visible_rows) / total_rows)
+
+# Handles scrollbar commands and mouse wheel events for the virtual tile grid
+def scroll_tile_grid(action, amount, unit=None):
+    total_rows = (len(preview_state['page'].tiles) + 2) // 3
+    if action == 'moveto':
+        first = round(float(amount) * total_rows)
+    else:
+        step = len(preview_state['tile_slots']) // 3 if unit == 'pages' else 1
+        first = preview_state['tile_first'] + int(amount) * step
+    if first != preview_state['tile_first']:
+        show_tile_rows(first)
+    return 'break'
+
+# Creates the preview skeleton (title, intro, list or empty tile grid) for a
+# newly loaded page
+def build_preview_layout(parsed):
+    clear_frame(preview_frame)
+    preview_state.clear()
+    preview_state['page'] = parsed
+    preview_state['layout'] = (parsed.is_list_page, len(parsed.tiles))
+    preview_state['title_label'] = ttk.Label(preview_frame, text=parsed.title, font=('Verdana', 12, 'bold'))
+    preview_state['title_label'].pack(pady=5)
+    preview_state['intro_frame'] = ttk.Frame(preview_frame)
+    preview_state['intro_frame'].pack(fill=tk.X, pady=2)
+    preview_state['intro_key'] = None
+    if parsed.is_list_page:
+        preview_state['list_frame'] = ttk.Frame(preview_frame)
+        preview_state['list_frame'].pack(fill=tk.X, padx=2, pady=2)
+        preview_state['list_key'] = None
+    else:
+        tiles_frame = ttk.Frame(preview_frame)
+        tiles_frame.pack(fill=tk.BOTH, expand=True)
+        preview_state['tiles_frame'] = tiles_frame
+        preview_state['tiles'] = [{'frame': None, 'sub_frame': None, 'fill_panel': None, 'signature': None}
+                                  for tile in parsed.tiles]
+        # Only the rows in view get tile frames, refilled while scrolling
+        total_rows = (len(parsed.tiles) + 2) // 3
+        visible_rows = min(total_rows, VIRTUAL_TILE_ROWS)
+        slots = []
+        for i in range(min(len(parsed.tiles), visible_rows * 3)):
+            tile_frame = ttk.Frame(tiles_frame, borderwidth=2, relief='raised', width=80, height=90)
+            tile_frame.grid(row=i // 3, column=i % 3, padx=2, pady=2, sticky=tk.NSEW)
+            slots.append(tile_frame)
+        preview_state['tile_slots'] = slots
+        preview_state['slot_entries'] = [None] * len(slots)
+        preview_state['tile_first'] = 0
+        preview_state['tile_scrollbar'] = None
+        if total_rows > visible_rows:
+            scrollbar = ttk.Scrollbar(tiles_frame, orient=tk.VERTICAL, command=scroll_tile_grid)
+            scrollbar.grid(row=0, column=3, rowspan=visible_rows, sticky=tk.NS)
+            preview_state['tile_scrollbar'] = scrollbar
+            bind_tile_grid_wheel(tiles_frame)
+        for i in range(max(visible_rows, 1)):
+            tiles_frame.rowconfigure(i, weight=1)
+        for i in range(3):
+            tiles_frame.columnconfigure(i, weight=1)
+        show_tile_rows(0)
+
+# Builds a preview of the parsed HTML content in the GUI, patching only the
+# parts that changed since the last call
 def build_preview(parsed):
     try:
-        clear_frame(preview_frame)
         if not parsed:
+            clear_frame(preview_frame)
+            preview_state.clear()
             return
-        title_label = ttk.Label(preview_frame, text=parsed['title'], font=('Verdana', 12, 'bold'))
-        title_label.pack(pady=5)
-        intro_frame = ttk.Frame(preview_frame)
-        intro_frame.pack(fill=tk.X, pady=2)
-        if parsed['top_img']:
-            local_path = download_image(parsed['top_img'])
-            if local_path:
-                img_label = ttk.Label(intro_frame)
-                img_label.pack()
-                active_labels.append(img_label) # Track label
-                threading.Thread(target=load_image_async, args=(local_path, img_label, None)).start()
+        prefetch_icons(collect_icon_urls(parsed, include_sub_tiles=False)) # Sub-tile icons wait until their panel opens
+        if preview_state.get('page') is not parsed or preview_state['layout'] != (parsed.is_list_page, len(parsed.tiles)):
+            build_preview_layout(parsed)
+        preview_state['title_label'].config(text=parsed.title)
         additional_text = add_text.get("1.0", tk.END).strip()
-        if additional_text:
-            add_lines = additional_text.split('\n')
-            for line in add_lines:
-                if line.strip():
-                    add_label = ttk.Label(intro_frame, text=line.strip(), justify=tk.LEFT, wraplength=300, font=('Verdana', 8))
-                    add_label.pack(anchor=tk.W)
-        if parsed['is_list_page']:
-            list_frame = ttk.Frame(preview_frame)
-            list_frame.pack(fill=tk.X, padx=2, pady=2)
-            for tile in parsed['tiles']:
-                sub_text = ttk.Label(list_frame, text=tile['text'], font=('Verdana', 6), wraplength=250)
-                sub_text.pack(anchor=tk.W, pady=1)
+        intro_key = (parsed.top_img, additional_text)
+        if preview_state['intro_key'] != intro_key:
+            fill_preview_intro(preview_state['intro_frame'], parsed, additional_text)
+            preview_state['intro_key'] = intro_key
+        if parsed.is_list_page:
+            list_key = tuple(tile.text for tile in parsed.tiles)
+            if preview_state['list_key'] != list_key:
+                fill_preview_list(preview_state['list_frame'], parsed.tiles)
+                preview_state['list_key'] = list_key
         else:
-            tiles_frame = ttk.Frame(preview_frame)
-            tiles_frame.pack(fill=tk.BOTH, expand=True)
-            row = 0
-            col = 0
-            sub_frames = {}
-            for tile in parsed['tiles']:
-                tile_frame = ttk.Frame(tiles_frame, borderwidth=2, relief='raised', width=80, height=90)
-                tile_frame.grid(row=row, column=col, padx=2, pady=2, sticky=tk.NSEW)
-                if tile['icon']:
-                    local_path = download_image(tile['icon'])
-                    if local_path:
-                        icon_label = ttk.Label(tile_frame)
-                        icon_label.pack()
-                        active_labels.append(icon_label) # Track label
-                        threading.Thread(target=load_image_async, args=(local_path, icon_label, (35, 35))).start()
-                text_label = ttk.Label(tile_frame, text=tile['text'], font=('Verdana', 7, 'bold'), wraplength=70)
-                text_label.pack()
-                if tile['href'].startswith('campusm://pocketguide?pg_code=') and not tile['use_direct']:
-                    sub_frame = ttk.Frame(preview_frame, borderwidth=2, relief='sunken')
-                    sub_frames[tile['text']] = sub_frame
-                    if tile['mode'] == 'text_only' or tile['sub_tiles']:
-                        if tile.get('sub_add_text', ''):
-                            sub_add_label = ttk.Label(sub_frame, text=tile['sub_add_text'], justify=tk.LEFT, wraplength=300, font=('Verdana', 8))
-                            sub_add_label.pack(anchor=tk.CENTER, pady=2)
-                        if tile['sub_tiles']: # Only add sub-tiles if not text_only (which sets sub_tiles=None)
-                            if tile['mode'] == 'list':
-                                list_frame = ttk.Frame(sub_frame)
-                                list_frame.pack(fill=tk.X, padx=2, pady=2)
-                                for sub_tile in tile['sub_tiles']:
-                                    sub_text = ttk.Label(list_frame, text=sub_tile['text'], font=('Verdana', 6), wraplength=250)
-                                    sub_text.pack(anchor=tk.W, pady=1)
-                            else:
-                                sub_tiles_frame = ttk.Frame(sub_frame)
-                                sub_tiles_frame.pack(fill=tk.X, padx=2, pady=2)
-                                sub_row_frame = None
-                                sub_col = 0
-                                for sub_tile in tile['sub_tiles']:
-                                    if sub_col == 0:
-                                        sub_row_frame = ttk.Frame(sub_tiles_frame)
-                                        sub_row_frame.pack(fill=tk.X, pady=1)
-                                    sub_tile_frame = ttk.Frame(sub_row_frame, borderwidth=1, relief='ridge', width=60, height=70)
-                                    sub_tile_frame.pack(side=tk.LEFT, padx=2, pady=2, expand=True, fill=tk.X)
-                                    if sub_tile['icon']:
-                                        sub_local = download_image(sub_tile['icon'])
-                                        if sub_local:
-                                            sub_icon = ttk.Label(sub_tile_frame)
-                                            sub_icon.pack()
-                                            active_labels.append(sub_icon) # Track label
-                                            threading.Thread(target=load_image_async, args=(sub_local, sub_icon, (25, 25))).start()
-                                    sub_text = ttk.Label(sub_tile_frame, text=sub_tile['text'], font=('Verdana', 6), wraplength=50)
-                                    sub_text.pack()
-                                    sub_col += 1
-                                    if sub_col >= 3:
-                                        sub_col = 0
-                    def toggle(sub_f=sub_frame):
-                        if sub_f.winfo_ismapped():
-                            sub_f.pack_forget()
-                        else:
-                            sub_f.pack(after=tiles_frame, fill=tk.X, pady=2)
-                    tile_frame.bind('<Button-1>', lambda e, s=sub_frame: toggle())
-                col += 1
-                if col >= 3:
-                    col = 0
-                    row += 1
-            for i in range(row + 1):
-                tiles_frame.rowconfigure(i, weight=1)
-            for i in range(3):
-                tiles_frame.columnconfigure(i, weight=1)
+            for entry, tile in zip(preview_state['slot_entries'], parsed.tiles[preview_state['tile_first'] * 3:]):
+                if entry is not None and entry['signature'] != tile_signature(tile):
+                    fill_preview_tile(entry, tile, preview_state['tiles_frame'])
+        active_labels[:] = [label for label in active_labels if label.winfo_exists()]
     except Exception as e:
         messagebox.showerror("Preview Error", f"Error building preview: {str(e)}")
         print(f"Build preview error: {str(e)}")
 
+# Fills a template preview panel with four placeholder sub-tiles
+def fill_template_sub_panel(sub_frame):
+    sub_tiles_frame = ttk.Frame(sub_frame)
+    sub_tiles_frame.pack(fill=tk.X, padx=2, pady=2)
+    sub_row_frame = None
+    sub_col = 0
+    for j in range(4):
+        if sub_col == 0:
+            sub_row_frame = ttk.Frame(sub_tiles_frame)
+            sub_row_frame.pack(fill=tk.X, pady=1)
+        sub_tile_frame = ttk.Frame(sub_row_frame, borderwidth=1, relief='ridge', width=60, height=70)
+        sub_tile_frame.pack(side=tk.LEFT, padx=2, pady=2, expand=True, fill=tk.X)
+        sub_text = ttk.Label(sub_tile_frame, text=f"Sub {j+1}", font=('Verdana', 6), wraplength=50)
+        sub_text.pack()
+        sub_col += 1
+        if sub_col >= 3:
+            sub_col = 0
+
 # Builds a template preview with placeholder tiles
 def build_template_preview():
     try:
         clear_frame(preview_frame)
+        preview_state.clear()
         title_label = ttk.Label(preview_frame, text="Template Preview", font=('Verdana', 12, 'bold'))
         title_label.pack(pady=5)
         intro_frame = ttk.Frame(preview_frame)
@@ -902,57 +1623,34 @@ def build_template_preview():
         tiles_frame = ttk.Frame(preview_frame)
         tiles_frame.pack(fill=tk.BOTH, expand=True)
         placeholder_tiles = [
-            {'text': 'Tile 1', 'icon': 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Advisor.png'},
-            {'text': 'Tile 2', 'icon': 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Academics.png'},
-            {'text': 'Tile 3', 'icon': 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Events.png'},
-            {'text': 'Tile 4', 'icon': 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Advisor.png'},
-            {'text': 'Tile 5', 'icon': 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Academics.png'},
-            {'text': 'Tile 6', 'icon': 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Events.png'},
-            {'text': 'Tile 7', 'icon': 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Advisor.png'},
-            {'text': 'Tile 8', 'icon': 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Academics.png'},
-            {'text': 'Tile 9', 'icon': 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Events.png'},
-            {'text': 'Direct Link 1', 'icon': 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Advisor.png'},
-            {'text': 'Direct Link 2', 'icon': 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Academics.png'},
-            {'text': 'Direct Link 3', 'icon': 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Events.png'},
+            Tile('Tile 1', 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Advisor.png'),
+            Tile('Tile 2', 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Academics.png'),
+            Tile('Tile 3', 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Events.png'),
+            Tile('Tile 4', 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Advisor.png'),
+            Tile('Tile 5', 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Academics.png'),
+            Tile('Tile 6', 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Events.png'),
+            Tile('Tile 7', 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Advisor.png'),
+            Tile('Tile 8', 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Academics.png'),
+            Tile('Tile 9', 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Events.png'),
+            Tile('Direct Link 1', 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Advisor.png'),
+            Tile('Direct Link 2', 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Academics.png'),
+            Tile('Direct Link 3', 'https://portal-na.campusm.exlibrisgroup.com/assets/MonroeCommunityCollege/MonroeCommunityCollege/Icons-from-Campusm/996600-hex-color/Events.png'),
         ]
         row = 0
         col = 0
-        sub_frames = {}
+        prefetch_icons([tile.icon for tile in placeholder_tiles])
         for i, tile in enumerate(placeholder_tiles):
             tile_frame = ttk.Frame(tiles_frame, borderwidth=2, relief='raised', width=80, height=90)
             tile_frame.grid(row=row, column=col, padx=2, pady=2, sticky=tk.NSEW)
-            local_path = download_image(tile['icon'])
-            if local_path:
-                icon_label = ttk.Label(tile_frame)
-                icon_label.pack()
-                active_labels.append(icon_label) # Track label
-                threading.Thread(target=load_image_async, args=(local_path, icon_label, (35, 35))).start()
-            text_label = ttk.Label(tile_frame, text=tile['text'], font=('Verdana', 7, 'bold'), wraplength=70)
+            icon_label = ttk.Label(tile_frame)
+            icon_label.pack()
+            active_labels.append(icon_label) # Track label
+            show_icon(tile.icon, icon_label, (35, 35))
+            text_label = ttk.Label(tile_frame, text=tile.text, font=('Verdana', 7, 'bold'), wraplength=70)
             text_label.pack()
             if i < 9:
-                sub_frame = ttk.Frame(preview_frame, borderwidth=2, relief='sunken')
-                sub_frames[tile['text']] = sub_frame
-                sub_tiles_frame = ttk.Frame(sub_frame)
-                sub_tiles_frame.pack(fill=tk.X, padx=2, pady=2)
-                sub_row_frame = None
-                sub_col = 0
-                for j in range(4):
-                    if sub_col == 0:
-                        sub_row_frame = ttk.Frame(sub_tiles_frame)
-                        sub_row_frame.pack(fill=tk.X, pady=1)
-                    sub_tile_frame = ttk.Frame(sub_row_frame, borderwidth=1, relief='ridge', width=60, height=70)
-                    sub_tile_frame.pack(side=tk.LEFT, padx=2, pady=2, expand=True, fill=tk.X)
-                    sub_text = ttk.Label(sub_tile_frame, text=f"Sub {j+1}", font=('Verdana', 6), wraplength=50)
-                    sub_text.pack()
-                    sub_col += 1
-                    if sub_col >= 3:
-                        sub_col = 0
-                def toggle(sub_f=sub_frame):
-                    if sub_f.winfo_ismapped():
-                        sub_f.pack_forget()
-                    else:
-                        sub_f.pack(after=tiles_frame, fill=tk.X, pady=2)
-                tile_frame.bind('<Button-1>', lambda e, s=sub_frame: toggle())
+                entry = {'sub_frame': None, 'fill_panel': fill_template_sub_panel}
+                tile_frame.bind('<Button-1>', lambda e, en=entry: toggle_sub_panel(en, tiles_frame))
             col += 1
             if col >= 3:
                 col = 0
@@ -968,34 +1666,28 @@ def build_template_preview():
 # Checks if all required sub-pages have been uploaded
 def check_all_uploaded():
     if parsed_data:
-        for tile in parsed_data['tiles']:
-            if tile['href'].startswith('campusm://pocketguide?pg_code='):
-                if not (tile['use_direct'] or tile['sub_tiles'] is not None or tile['mode'] == 'text_only'):
-                    return False
-        return True
+        return not parsed_data.pending
     return False
 
 # Creates click-based menu for tile options
 def create_hover_menu(tile, label, sub_frame):
     def show_menu(event):
         # Hide all other menus and reset their label colors
-        for other_tile_text, btns in sub_buttons.items():
-            if other_tile_text != tile['text']:
+        for other_tile_id, btns in sub_buttons.items():
+            if other_tile_id != tile.tile_id:
                 btns['menu'].unpost()
-                other_label = btns['text_btn'].master.winfo_children()[0]
-                other_tile = next((t for t in parsed_data['tiles'] if t['text'] == other_tile_text), None)
-                if other_tile:
-                    other_label.config(foreground="#008000" if other_tile.get('sub_tiles') or other_tile.get('use_direct') or other_tile['mode'] == 'text_only' else "black")
+                other_tile = parsed_data.tile(other_tile_id)
+                btns['label'].config(foreground="#008000" if other_tile.sub_tiles or other_tile.use_direct or other_tile.mode == TileMode.TEXT_ONLY else "black")
         menu.delete(0, tk.END)
-        if tile.get('sub_tiles') is None:
+        if tile.sub_tiles is None:
             menu.add_command(label="Upload", command=lambda: start_upload_sub_thread(tile))
-            menu.add_command(label="Direct", command=lambda: set_mode(tile, 'direct', None))
-            menu.add_command(label="Text Only", command=lambda: set_mode(tile, 'text_only', None))
+            menu.add_command(label="Direct", command=lambda: set_mode(tile, TileMode.DIRECT, None))
+            menu.add_command(label="Text Only", command=lambda: set_mode(tile, TileMode.TEXT_ONLY, None))
         else:
-            menu.add_command(label="List", command=lambda: set_mode(tile, 'list', None))
-            if not tile.get('sub_is_list', False): # Only show Tiles if not a list page
-                menu.add_command(label="Tiles", command=lambda: set_mode(tile, 'tiles', None))
-            menu.add_command(label="Text Only", command=lambda: set_mode(tile, 'text_only', None))
+            menu.add_command(label="List", command=lambda: set_mode(tile, TileMode.LIST, None))
+            if not tile.sub_is_list: # Only show Tiles if not a list page
+                menu.add_command(label="Tiles", command=lambda: set_mode(tile, TileMode.TILES, None))
+            menu.add_command(label="Text Only", command=lambda: set_mode(tile, TileMode.TEXT_ONLY, None))
             menu.add_command(label="Redo", command=lambda t=tile: redo_upload(t))
         # Only change to blue if not green
         if label.cget('foreground') != '#008000':
@@ -1004,29 +1696,30 @@ def create_hover_menu(tile, label, sub_frame):
     def hide_menu(event=None):
         menu.unpost()
         # Revert to green if uploaded or direct or text_only, else black
-        label.config(foreground="#008000" if tile.get('sub_tiles') or tile.get('use_direct') or tile['mode'] == 'text_only' else "black")
+        label.config(foreground="#008000" if tile.sub_tiles or tile.use_direct or tile.mode == TileMode.TEXT_ONLY else "black")
     menu = tk.Menu(sub_frame, tearoff=0)
     label.bind("<Button-1>", show_menu)
-    root.bind("<Button-1>", lambda e: hide_menu() if e.widget != label and e.widget != menu and e.widget not in [sub_buttons[tile['text']]['text_btn']] else None) # Hide on click elsewhere
+    root.bind("<Button-1>", lambda e: hide_menu() if e.widget != label and e.widget != menu and e.widget not in [sub_buttons[tile.tile_id]['text_btn']] else None) # Hide on click elsewhere
     menu.bind("<Leave>", hide_menu) # Hide when mouse leaves menu
     menu.bind("<Button-1>", lambda e: hide_menu()) # Hide on menu item click
     return menu
 
 # Handles redo action for sub-page uploads
 def redo_upload(tile):
-    tile['sub_tiles'] = None
-    tile['sub_add_text'] = ''
-    tile['use_direct'] = False
-    tile['mode'] = 'tiles' # default
-    if 'sub_text_widget' in sub_buttons[tile['text']]:
-        sub_buttons[tile['text']]['sub_text_widget'].destroy()
-        del sub_buttons[tile['text']]['sub_text_widget']
-        if 'submit_btn' in sub_buttons[tile['text']]:
-            sub_buttons[tile['text']]['submit_btn'].destroy()
-            del sub_buttons[tile['text']]['submit_btn']
-        sub_buttons[tile['text']]['text_btn']['text'] = 'Add Text'
+    tile.sub_page = None
+    tile.sub_add_text = ''
+    tile.use_direct = False
+    tile.mode = TileMode.TILES # default
+    parsed_data.update_pending(tile)
+    if 'sub_text_widget' in sub_buttons[tile.tile_id]:
+        sub_buttons[tile.tile_id]['sub_text_widget'].destroy()
+        del sub_buttons[tile.tile_id]['sub_text_widget']
+        if 'submit_btn' in sub_buttons[tile.tile_id]:
+            sub_buttons[tile.tile_id]['submit_btn'].destroy()
+            del sub_buttons[tile.tile_id]['submit_btn']
+        sub_buttons[tile.tile_id]['text_btn']['text'] = 'Add Text'
     # Update label color to black
-    label = sub_buttons[tile['text']]['text_btn'].master.winfo_children()[0]
+    label = sub_buttons[tile.tile_id]['label']
     label.config(foreground="black")
     build_preview(parsed_data)
     if check_all_uploaded():
@@ -1036,29 +1729,30 @@ def redo_upload(tile):
 
 # Sets the mode for a tile (direct, tiles, or list)
 def set_mode(tile, mode, _): # Ignore the upload_btn param
-    if mode == 'tiles' and tile.get('sub_is_list', False):
+    if mode == TileMode.TILES and tile.sub_is_list:
         messagebox.showwarning("Invalid Mode", "Submenu (tiles) not available for list-style sub-pages.")
         return
-    if mode == 'direct':
-        tile['use_direct'] = True
-        tile['mode'] = 'direct'
-        tile['sub_tiles'] = None
-        tile['sub_add_text'] = ''
-        if 'sub_text_widget' in sub_buttons[tile['text']]:
-            sub_buttons[tile['text']]['sub_text_widget'].destroy()
-            del sub_buttons[tile['text']]['sub_text_widget']
-            if 'submit_btn' in sub_buttons[tile['text']]:
-                sub_buttons[tile['text']]['submit_btn'].destroy()
-                del sub_buttons[tile['text']]['submit_btn']
-            sub_buttons[tile['text']]['text_btn']['text'] = 'Add Text'
+    if mode == TileMode.DIRECT:
+        tile.use_direct = True
+        tile.mode = TileMode.DIRECT
+        tile.sub_page = None
+        tile.sub_add_text = ''
+        if 'sub_text_widget' in sub_buttons[tile.tile_id]:
+            sub_buttons[tile.tile_id]['sub_text_widget'].destroy()
+            del sub_buttons[tile.tile_id]['sub_text_widget']
+            if 'submit_btn' in sub_buttons[tile.tile_id]:
+                sub_buttons[tile.tile_id]['submit_btn'].destroy()
+                del sub_buttons[tile.tile_id]['submit_btn']
+            sub_buttons[tile.tile_id]['text_btn']['text'] = 'Add Text'
     else:
-        tile['use_direct'] = False
-        tile['mode'] = mode
-        if mode == 'text_only':
-            tile['sub_tiles'] = None # Discard any uploaded sub-tiles for text_only
+        tile.use_direct = False
+        tile.mode = mode
+        if mode == TileMode.TEXT_ONLY:
+            tile.sub_page = None # Discard any uploaded sub-tiles for text_only
+    parsed_data.update_pending(tile)
     # Update label color: green if uploaded or direct or text_only, else black
-    label = sub_buttons[tile['text']]['text_btn'].master.winfo_children()[0]
-    label.config(foreground="#008000" if tile.get('sub_tiles') or tile.get('use_direct') or tile['mode'] == 'text_only' else "black")
+    label = sub_buttons[tile.tile_id]['label']
+    label.config(foreground="#008000" if tile.sub_tiles or tile.use_direct or tile.mode == TileMode.TEXT_ONLY else "black")
     if check_all_uploaded():
         export_btn.config(state=tk.NORMAL)
     else:
@@ -1068,30 +1762,30 @@ def set_mode(tile, mode, _): # Ignore the upload_btn param
 # Handles text button for sub-page additional text
 def handle_text_button(tile, text_btn):
     if text_btn.cget('text') == 'Redo':
-        tile['sub_add_text'] = ''
+        tile.sub_add_text = ''
         text_btn.config(text='Add Text')
-        if 'sub_text_widget' in sub_buttons[tile['text']]:
-            sub_buttons[tile['text']]['sub_text_widget'].destroy()
-            del sub_buttons[tile['text']]['sub_text_widget']
-            if 'submit_btn' in sub_buttons[tile['text']]:
-                sub_buttons[tile['text']]['submit_btn'].destroy()
-                del sub_buttons[tile['text']]['submit_btn']
+        if 'sub_text_widget' in sub_buttons[tile.tile_id]:
+            sub_buttons[tile.tile_id]['sub_text_widget'].destroy()
+            del sub_buttons[tile.tile_id]['sub_text_widget']
+            if 'submit_btn' in sub_buttons[tile.tile_id]:
+                sub_buttons[tile.tile_id]['submit_btn'].destroy()
+                del sub_buttons[tile.tile_id]['submit_btn']
         build_preview(parsed_data)
         return
     sub_frame = text_btn.master
-    if 'sub_text_widget' not in sub_buttons[tile['text']]:
+    if 'sub_text_widget' not in sub_buttons[tile.tile_id]:
         text_widget = tk.Text(sub_frame, height=2, width=15, font=('Verdana', 8))
         text_widget.pack(side=tk.LEFT, pady=2)
         text_widget.bind("<KeyRelease>", lambda e, t=tile: update_sub_text(t, text_widget.get("1.0", tk.END).strip()))
         submit_btn = ttk.Button(sub_frame, text="Submit", command=lambda tw=text_widget, tb=text_btn, t=tile: submit_text(tw, tb, t))
         submit_btn.pack(side=tk.LEFT, padx=2)
-        sub_buttons[tile['text']]['sub_text_widget'] = text_widget
-        sub_buttons[tile['text']]['submit_btn'] = submit_btn
+        sub_buttons[tile.tile_id]['sub_text_widget'] = text_widget
+        sub_buttons[tile.tile_id]['submit_btn'] = submit_btn
 
 # Submits text and hides text widget
 def submit_text(text_widget, text_btn, tile):
     text_widget.pack_forget()
-    sub_buttons[tile['text']]['submit_btn'].pack_forget()
+    sub_buttons[tile.tile_id]['submit_btn'].pack_forget()
     text_btn.config(text='Redo')
     build_preview(parsed_data)
 
@@ -1100,7 +1794,7 @@ def process_upload(file_path, is_sub=False, tile=None):
     try:
         with open(file_path, 'r') as f:
             html_content = f.read()
-        parsed = parse_page(html_content)
+        parsed = parse_page_cached(html_content)
         if not parsed:
             return None
         return parsed
@@ -1111,24 +1805,42 @@ def process_upload(file_path, is_sub=False, tile=None):
 
 # Handles main page upload in a separate thread
 def upload_main_thread(file_path):
-    global parsed_data
-    parsed_data = process_upload(file_path)
-    if not parsed_data:
+    global parsed_data, main_file_path
+    parsed = process_upload(file_path)
+    if not parsed:
         return
-    root.after(0, lambda: update_gui_after_main_upload())
+    prefetch_icons(collect_icon_urls(parsed, include_sub_tiles=False))
+    found = find_sub_pages(parsed, os.path.dirname(file_path), os.path.splitext(os.path.basename(file_path))[0])
+    parsed_data = parsed
+    main_file_path = file_path
+    root.after(0, lambda: update_gui_after_main_upload(found))
+
+# Looks up the sub-pages of a page in the page store, reporting problems
+# instead of raising so the upload still completes
+def find_sub_pages(parsed, near=None, root_code=None):
+    try:
+        return crawl_pages(parsed, get_page_store(), near, root_code).top
+    except Exception as e:
+        print(f"Sub-page lookup error: {str(e)}")
+        return []
 
-# Updates GUI after main page upload
-def update_gui_after_main_upload():
-    for widget in list(inner_frame.winfo_children())[6:]:
+# Updates GUI after main page upload; sub-pages found in the page store are
+# attached first
+def update_gui_after_main_upload(found=()):
+    for widget in list(inner_frame.winfo_children())[7:]:
         widget.destroy()
     global sub_buttons
     sub_buttons = {}
+    for tile, pg_code, sub_parsed in found:
+        if sub_parsed:
+            attach_sub_page(parsed_data, tile, sub_parsed)
     labels = []
-    internal_tiles = [t for t in parsed_data['tiles'] if t['href'].startswith('campusm://pocketguide?pg_code=')]
+    internal_tiles = [t for t in parsed_data.tiles if t.href.startswith(POCKETGUIDE_PREFIX)]
     for itile in internal_tiles:
         sub_frame = ttk.Frame(inner_frame)
         sub_frame.pack(pady=2, anchor=tk.W)
-        label = ttk.Label(sub_frame, text=f"For {itile['text']}:", font=('Verdana', 7), wraplength=150)
+        label = ttk.Label(sub_frame, text=f"For {itile.text}:", font=('Verdana', 7), wraplength=150,
+                          foreground="#008000" if itile.sub_tiles else "black")
         label.pack(side=tk.LEFT)
         labels.append(label)
         active_labels.append(label) # Track label
@@ -1136,7 +1848,7 @@ def update_gui_after_main_upload():
         text_btn = ttk.Button(sub_frame, text="Add Text")
         text_btn.pack(side=tk.LEFT, padx=2)
         text_btn.config(command=lambda t=itile, tb=text_btn: handle_text_button(t, tb))
-        sub_buttons[itile['text']] = {'menu': menu, 'text_btn': text_btn}
+        sub_buttons[itile.tile_id] = {'label': label, 'menu': menu, 'text_btn': text_btn}
     align_buttons()
     build_preview(parsed_data)
     if check_all_uploaded():
@@ -1161,172 +1873,524 @@ def upload_sub_thread(file_path, tile):
     sub_parsed = process_upload(file_path, is_sub=True, tile=tile)
     if not sub_parsed:
         return
+    get_page_store().add(get_pg_code(tile.href), file_path)
+    # Pages linked from the chosen sub-page are attached too, so the whole
+    # hierarchy below it exports
+    for sub_tile, pg_code, page in find_sub_pages(sub_parsed, os.path.dirname(file_path), get_pg_code(tile.href)):
+        if page:
+            attach_sub_page(sub_parsed, sub_tile, page)
     root.after(0, lambda: update_gui_after_sub_upload(tile, sub_parsed))
 
 # Updates GUI after sub-page upload
 def update_gui_after_sub_upload(tile, sub_parsed):
-    tile['sub_tiles'] = sub_parsed['tiles']
-    tile['sub_is_list'] = sub_parsed['is_list_page']
-    if tile['sub_is_list']:
-        set_mode(tile, 'list', None)
+    tile.sub_page = SubPage(sub_parsed.title, sub_parsed.tiles, sub_parsed.is_list_page)
+    parsed_data.update_pending(tile)
+    if tile.sub_is_list:
+        set_mode(tile, TileMode.LIST, None)
     else:
-        set_mode(tile, 'tiles', None)
+        set_mode(tile, TileMode.TILES, None)
     # Update label color to green
-    label = sub_buttons[tile['text']]['text_btn'].master.winfo_children()[0]
+    label = sub_buttons[tile.tile_id]['label']
     label.config(foreground="#008000")
     build_preview(parsed_data)
     if check_all_uploaded():
         export_btn.config(state=tk.NORMAL)
 
+# Lets the user pick a folder of saved sub-pages, then resolves the current
+# page's remaining tiles from it
+def select_sub_page_dir():
+    dir_path = filedialog.askdirectory()
+    if not dir_path:
+        return
+    get_page_store().add_directory(dir_path)
+    if parsed_data:
+        threading.Thread(target=resolve_sub_pages_thread, args=(parsed_data, main_file_path)).start()
+
+# Loads sub-pages for a page in a separate thread
+def resolve_sub_pages_thread(parsed, file_path):
+    # Saved pages are named after their pg_code, so links back to the main
+    # page count as cycles instead of embedding it in its own sub-page
+    found = find_sub_pages(parsed, os.path.dirname(file_path), os.path.splitext(os.path.basename(file_path))[0])
+    root.after(0, lambda: update_gui_after_sub_pages_found(parsed, found))
+
+# Updates GUI after sub-pages were found in the page store; tiles the user
+# resolved in the meantime are left alone
+def update_gui_after_sub_pages_found(parsed, found):
+    if parsed is not parsed_data:
+        return # A different main page was uploaded meanwhile
+    for tile, pg_code, sub_parsed in found:
+        if sub_parsed and tile.is_pending:
+            attach_sub_page(parsed, tile, sub_parsed)
+            sub_buttons[tile.tile_id]['label'].config(foreground="#008000")
+    build_preview(parsed_data)
+    if check_all_uploaded():
+        export_btn.config(state=tk.NORMAL)
+    else:
+        export_btn.config(state=tk.DISABLED)
+        missing = sum(1 for tile, pg_code, sub_parsed in found if not sub_parsed)
+        if missing:
+            messagebox.showinfo("Sub-Pages Not Found",
+                                f"{missing} sub-page(s) were not found. Sub-pages are matched by pg_code: "
+                                f"a file named <pg_code>.html, or a page listed in the folder's {SAVED_PG_MAP_NAME}, "
+                                "which HTMLSaverwlabel writes when a page is saved with its pg_code.")
+
 # Updates sub-tile additional text
 def update_sub_text(tile, text):
-    tile['sub_add_text'] = text
+    tile.sub_add_text = text
 
 # Aligns buttons and labels for consistent UI appearance
 def align_buttons():
     if not sub_buttons:
         return
-    labels = []
-    for key, btns in sub_buttons.items():
-        sub_frame = btns['text_btn'].master
-        label = sub_frame.winfo_children()[0]
-        labels.append(label)
+    labels = [btns['label'] for btns in sub_buttons.values()]
     if labels:
         max_label_len = max(len(label.cget('text').replace('\n', '')) for label in labels)
         for label in labels:
             label.config(width=max_label_len // 2 + 1, anchor=tk.W)
 
-# Exports the parsed data to an ADA-compliant HTML file
-def export():
-    try:
-        if not parsed_data:
-            return
+# Minifies the template CSS: drops comments and the whitespace around
+# punctuation, keeping every rule intact
+def minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+# Minifies the template JavaScript line by line: strips indentation, blank
+# lines and whole-line comments, but keeps line breaks so statements without
+# semicolons still end where they did
+def minify_js(js):
+    lines = (line.strip() for line in js.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+# Minifies the template CSS and JavaScript once and names each by a hash of its
+# content, so pages built with the same assets share the same files and a
+# changed asset never reuses a cached name
+def compile_assets():
+    global compiled_assets
+    if compiled_assets is None:
+        css = minify_css(css_string)
+        js = minify_js(BeautifulSoup(template_html, 'lxml').find('script').string)
+        compiled_assets = {
+            'css': css,
+            'js': js,
+            'css_name': f"styles.{hashlib.sha256(css.encode('utf-8')).hexdigest()[:12]}.css",
+            'js_name': f"app.{hashlib.sha256(js.encode('utf-8')).hexdigest()[:12]}.js",
+        }
+    return compiled_assets
+
+# Writes the shared asset files that exported pages link to: both for external
+# assets, the deferred stylesheet for critical CSS; existing files are kept
+# since the name fixes the content
+def write_assets(out_dir):
+    assets = compile_assets()
+    files = []
+    if asset_mode == 'external' or critical_css:
+        files.append((assets['css_name'], assets['css']))
+    if asset_mode == 'external':
+        files.append((assets['js_name'], assets['js']))
+    for name, text in files:
+        path = os.path.join(out_dir, name)
+        if not os.path.exists(path):
+            write_file_atomic(path, text.encode('utf-8'))
+
+# Parses template_html once per asset mode and splits the finished page
+# skeleton around its insertion slots
+def compile_template():
+    skeleton_parts = compiled_templates.get((asset_mode, critical_css))
+    if skeleton_parts is None:
         soup = BeautifulSoup(template_html, 'lxml')
-        soup.title.string = parsed_data['title']
+        soup.title.string = TEMPLATE_SLOT.format('title')
         header_title = soup.find('span', class_='header-title')
         if header_title:
-            header_title.string = parsed_data['title']
-        intro = soup.find('section', class_='intro')
-        if parsed_data['top_img']:
-            img_tag = soup.new_tag('img', src=parsed_data['top_img'], alt=parsed_data['title'], style="width:100%;")
-            intro.append(img_tag)
-        ada = soup.find('section', class_='ada-info')
-        additional_text = add_text.get("1.0", tk.END).rstrip('\n')
-        if additional_text:
-            add_div = soup.new_tag('div', style="max-width:600px; margin:0 auto; text-align:left;")
-            add_lines = additional_text.split('\n')
-            for line in add_lines:
-                p = soup.new_tag('p')
-                if line.strip(): # Non-empty lines
-                    p.string = line
-                else: # Blank lines
-                    p.append('\xa0') # Use non-breaking space for proper rendering
-                add_div.append(p)
-            ada.append(add_div)
-        nav_section = soup.find('section', class_='navigation-tiles')
-        for child in list(nav_section.children):
-            child.extract()
-        if parsed_data['is_list_page']:
-            ul = soup.new_tag('ul', **{'class': 'sub-link-list', 'role': 'list'})
-            for tile in parsed_data['tiles']:
-                li = soup.new_tag('li')
-                a = soup.new_tag('a', href=tile['href'], **{'class': 'tile-link', 'aria-label': tile['text'], 'tabindex': '0'})
-                a.string = tile['text']
-                li.append(a)
-                ul.append(li)
-            nav_section.append(ul)
-        else:
-            tile_count = 0
-            row_div = None
-            section_counter = {}
-            for tile in parsed_data['tiles']:
-                if tile_count % 3 == 0:
-                    row_div = soup.new_tag('div', **{'class': 'tile-row'})
-                    nav_section.append(row_div)
-                section_id_base = tile['text'].lower().replace(' ', '-')
-                section_counter[section_id_base] = section_counter.get(section_id_base, 0) + 1
-                section_id = f"{section_id_base}-{section_counter[section_id_base]}"
-                tile_div = soup.new_tag('div', **{'class': 'tile'})
-                if tile['icon']:
-                    icon_div = soup.new_tag('div', **{'class': 'tile-icon'})
-                    img = soup.new_tag('img', src=tile['icon'], alt="")
-                    icon_div.append(img)
-                    tile_div.append(icon_div)
-                text_div = soup.new_tag('div', **{'class': 'tile-text'})
-                text_div.string = tile['text']
-                tile_div.append(text_div)
-                if tile['href'].startswith('campusm://pocketguide?pg_code=') and not tile['use_direct'] and (tile['sub_tiles'] or tile['mode'] == 'text_only'):
-                    button = soup.new_tag('button', onclick=f"toggleSection('{section_id}', this)", onkeydown=f"handleKeydown(event, '{section_id}', this)", **{'data-section': section_id, 'tabindex': '0', 'aria-label': tile['text'], 'aria-expanded': 'false', 'aria-controls': section_id, 'class': 'tile-link navigation-tile'})
-                    button.append(tile_div)
-                    row_div.append(button)
-                    sub_sec = soup.new_tag('section', id=section_id, **{'class': 'tile-group'})
-                    container = soup.new_tag('div', **{'class': 'tile-group-container'})
-                    h3 = soup.new_tag('h3')
-                    h3.string = tile['text']
-                    container.append(h3)
-                    if tile['sub_add_text']:
-                        sub_add_div = soup.new_tag('div', **{'class': 'sub-add-text'})
-                        inner_div = soup.new_tag('div')
-                        sub_add_lines = tile['sub_add_text'].split('\n')
-                        for line in sub_add_lines:
-                            p = soup.new_tag('p')
-                            if line.strip(): # Non-empty lines
-                                p.string = line
-                            else: # Blank lines
-                                p.append('\xa0') # Use non-breaking space for proper rendering
-                            inner_div.append(p)
-                        sub_add_div.append(inner_div)
-                        container.append(sub_add_div)
-                    if tile['sub_tiles']: # Only add sub-tiles if not text_only (which sets sub_tiles=None)
-                        if tile['mode'] == 'list':
-                            ul = soup.new_tag('ul', **{'class': 'sub-link-list', 'role': 'list'})
-                            for sub in tile['sub_tiles']:
-                                li = soup.new_tag('li')
-                                sub_a = soup.new_tag('a', href=sub['href'], **{'class': 'tile-link', 'aria-label': sub['text'], 'tabindex': '0'})
-                                sub_a.string = sub['text']
-                                li.append(sub_a)
-                                ul.append(li)
-                            container.append(ul)
-                        else:
-                            grid = soup.new_tag('div', **{'class': 'tile-grid', 'role': 'list'})
-                            for sub in tile['sub_tiles']:
-                                sub_a = soup.new_tag('a', href=sub['href'], **{'class': 'tile-link', 'aria-label': sub['text'], 'tabindex': '0'})
-                                sub_tile_div = soup.new_tag('div', **{'class': 'tile', 'role': 'listitem'})
-                                if sub['icon']:
-                                    sub_icon_div = soup.new_tag('div', **{'class': 'tile-icon'})
-                                    sub_img = soup.new_tag('img', src=sub['icon'], alt="")
-                                    sub_icon_div.append(sub_img)
-                                    sub_tile_div.append(sub_icon_div)
-                                sub_text_div = soup.new_tag('div', **{'class': 'tile-text'})
-                                sub_text_div.string = sub['text']
-                                sub_tile_div.append(sub_text_div)
-                                sub_a.append(sub_tile_div)
-                                grid.append(sub_a)
-                            container.append(grid)
-                    sub_sec.append(container)
-                    nav_section.append(sub_sec)
-                else:
-                    a = soup.new_tag('a', href=tile['href'], **{'class': 'tile-link', 'aria-label': tile['text']})
-                    a.append(tile_div)
-                    row_div.append(a)
-                tile_count += 1
-        style_tag = soup.new_tag('style')
-        style_tag.string = css_string
-        soup.head.append(style_tag)
+            header_title.string = TEMPLATE_SLOT.format('header_title')
+        for slot, class_name in (('intro', 'intro'), ('ada_info', 'ada-info'), ('navigation_tiles', 'navigation-tiles')):
+            section = soup.find('section', class_=class_name)
+            section.clear()
+            section.append(TEMPLATE_SLOT.format(slot))
+        assets = compile_assets()
+        script = soup.find('script')
         css_link = soup.find('link', rel='stylesheet')
-        if css_link:
+        if css_link and (critical_css or asset_mode != 'external'):
             css_link.extract()
-        sanitized_title = parsed_data['title'].replace(' ', '_').replace('/', '_')
+            css_link = None
+        if critical_css:
+            # The rules this page needs go inline; the whole stylesheet follows
+            # without blocking rendering
+            style_tag = soup.new_tag('style')
+            style_tag.string = TEMPLATE_SLOT.format('critical_css')
+            soup.head.append(style_tag)
+            soup.head.append(soup.new_tag('link', rel='stylesheet', href=assets['css_name'], media='print', onload="this.media='all'"))
+            noscript = soup.new_tag('noscript')
+            noscript.append(soup.new_tag('link', rel='stylesheet', href=assets['css_name']))
+            soup.head.append(noscript)
+        elif asset_mode == 'external':
+            if css_link is None:
+                css_link = soup.new_tag('link', rel='stylesheet')
+                soup.head.append(css_link)
+            css_link['href'] = assets['css_name']
+        else:
+            style_tag = soup.new_tag('style')
+            style_tag.string = assets['css']
+            soup.head.append(style_tag)
+        if asset_mode == 'external':
+            script.clear()
+            script['src'] = assets['js_name']
+        else:
+            script.string = assets['js']
+        skeleton = str(soup)
+        parts = []
+        slots = []
+        for slot in ('title', 'critical_css', 'header_title', 'intro', 'ada_info', 'navigation_tiles'):
+            marker = TEMPLATE_SLOT.format(slot)
+            if marker not in skeleton:
+                continue
+            head, skeleton = skeleton.split(marker, 1)
+            parts.append(head)
+            slots.append(slot)
+        parts.append(skeleton)
+        skeleton_parts = compiled_templates[(asset_mode, critical_css)] = (parts, slots)
+    return skeleton_parts
+
+CSS_CLASS_ATTR = re.compile(r'class="([^"]*)"')
+HTML_TAG_OPEN = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)')
+JS_CLASS_TOGGLE = re.compile(r"classList\.(?:add|remove|toggle)\('([^']+)'\)")
+
+# Returns the class names and tag names that appear in a chunk of exported HTML
+def html_vocabulary(html):
+    classes = set()
+    for value in CSS_CLASS_ATTR.findall(html):
+        classes.update(value.split())
+    return classes, {tag.lower() for tag in HTML_TAG_OPEN.findall(html)}
+
+# Returns what a selector needs in the page to match: its class names and tag
+# names; pseudo-class arguments and attribute tests add nothing, so rules are
+# kept when in doubt
+def selector_requirements(selector):
+    selector = re.sub(r'\([^)]*\)|\[[^\]]*\]', '', selector)
+    classes = frozenset(re.findall(r'\.([A-Za-z0-9_-]+)', selector))
+    tags = frozenset(tag.lower() for tag in re.findall(r'(?:^|[\s>+~])([A-Za-z][A-Za-z0-9]*)', selector))
+    return classes, tags
+
+# Splits minified CSS into (prelude, body) blocks at the top level
+def split_css_blocks(css):
+    blocks = []
+    depth = 0
+    start = 0
+    body_start = 0
+    for i, ch in enumerate(css):
+        if ch == '{':
+            if depth == 0:
+                body_start = i + 1
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append((css[start:body_start - 1], css[body_start:i]))
+                start = i + 1
+    return blocks
+
+# Parses the minified stylesheet once into (prelude, body, selector
+# requirements, nested rules) entries; @media blocks carry their inner rules,
+# other at-rules have no requirements and are always kept
+def compile_css_rules():
+    global compiled_css_rules
+    if compiled_css_rules is None:
+        def parse(css):
+            rules = []
+            for prelude, body in split_css_blocks(css):
+                if prelude.startswith('@media'):
+                    rules.append((prelude, body, None, parse(body)))
+                elif prelude.startswith('@'):
+                    rules.append((prelude, body, None, None))
+                else:
+                    rules.append((prelude, body, [selector_requirements(selector) for selector in prelude.split(',')], None))
+            return rules
+        compiled_css_rules = {
+            'rules': parse(compile_assets()['css']),
+            'skeleton': None,
+            'scripted': set(JS_CLASS_TOGGLE.findall(compile_assets()['js'])), # Classes the page script adds at run time
+        }
+    return compiled_css_rules
+
+# Returns the CSS rules that can match a page's markup, keeping the
+# stylesheet's order
+def select_css_rules(rules, classes, tags):
+    out = []
+    for prelude, body, requirements, nested in rules:
+        if nested is not None:
+            inner = select_css_rules(nested, classes, tags)
+            if inner:
+                out.append(prelude + '{' + inner + '}')
+        elif requirements is None or any(needed_classes <= classes and needed_tags <= tags for needed_classes, needed_tags in requirements):
+            out.append(prelude + '{' + body + '}')
+    return ''.join(out)
+
+# Returns the critical CSS of a page from its skeleton parts and fragments
+def page_critical_css(parts, fragments):
+    css_rules = compile_css_rules()
+    if css_rules['skeleton'] is None:
+        css_rules['skeleton'] = html_vocabulary(''.join(parts))
+    classes, tags = html_vocabulary(''.join(fragments))
+    classes |= css_rules['skeleton'][0] | css_rules['scripted']
+    tags |= css_rules['skeleton'][1]
+    key = (frozenset(classes), frozenset(tags))
+    css = critical_css_cache.get(key)
+    if css is None:
+        css = critical_css_cache[key] = select_css_rules(css_rules['rules'], classes, tags)
+    return css
+
+# Escapes text content the same way BeautifulSoup's minimal formatter does
+def escape_text(text):
+    return html_escape(text, quote=False)
+
+# Escapes and quotes an attribute value as BeautifulSoup serializes it
+def quote_attr(value):
+    value = html_escape(value, quote=False)
+    if '"' in value:
+        if "'" in value:
+            return '"' + value.replace('"', '&quot;') + '"'
+        return "'" + value + "'"
+    return '"' + value + '"'
+
+# Appends <p> elements for each line of user text; blank lines keep a
+# non-breaking space
+def render_paragraphs(out, text):
+    for line in text.split('\n'):
+        out.append('<p>' + (escape_text(line) if line.strip() else '\xa0') + '</p>')
+
+# Resizes an image to fit within max_size pixels (exactly max_size when stretch
+# is set, as CSS does) and re-encodes it in the optimize_images format; returns
+# the encoded bytes, MIME type and pixel size
+def encode_image(local_path, max_size, stretch=False):
+    with Image.open(local_path) as img:
+        img.load()
+        has_alpha = img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+    if stretch:
+        size = max_size
+    else:
+        scale = min(max_size[0] / img.width, max_size[1] / img.height, 1) # Never upscaled
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    if size != img.size:
+        img = img.resize(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    if optimize_images == 'webp':
+        img.save(buffer, 'WEBP', quality=85, method=6)
+        mime = 'image/webp'
+    else:
+        img.save(buffer, 'PNG', optimize=True)
+        mime = 'image/png'
+    return buffer.getvalue(), mime, size
+
+# Turns an encoded image into an src: a data URI when small, otherwise a
+# content-hashed file under img/ in the output directory; without an output
+# directory large images keep their original URL
+def store_image(url, data, mime):
+    if len(data) <= INLINE_IMAGE_MAX_BYTES:
+        return 'data:' + mime + ';base64,' + base64.b64encode(data).decode('ascii')
+    if not image_out_dir:
+        return url
+    filename = hashlib.sha256(data).hexdigest()[:16] + '.' + optimize_images
+    path = os.path.join(image_out_dir, 'img', filename)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_file_atomic(path, data)
+    return 'img/' + filename
+
+# Optimizes the banner and every icon of a page, nested sub-tiles included,
+# that is not in optimized_images yet; all downloads go through the icon cache
+# at once and an image that fails keeps its original URL
+def optimize_page_images(parsed):
+    icons = []
+    stack = list(parsed.tiles)
+    seen = set()
+    while stack:
+        tile = stack.pop()
+        if id(tile) in seen:
+            continue
+        seen.add(id(tile))
+        if tile.icon:
+            icons.append(tile.icon)
+        stack.extend(tile.sub_tiles or [])
+    jobs = {url: (ICON_SIZE, ICON_SIZE) for url in icons}
+    if parsed.top_img:
+        jobs[parsed.top_img] = None
+    futures = {url: fetch_icon(url) for url in jobs if url not in optimized_images}
+    for url, future in futures.items():
+        css_size = jobs[url]
+        try:
+            local_path = future.result()
+            if not local_path:
+                raise ValueError("download failed")
+            if css_size:
+                data, mime, size = encode_image(local_path, (css_size[0] * IMAGE_PIXEL_RATIO, css_size[1] * IMAGE_PIXEL_RATIO), stretch=True)
+            else:
+                data, mime, size = encode_image(local_path, (BANNER_MAX_WIDTH, BANNER_MAX_WIDTH * 4))
+                css_size = size
+            optimized_images[url] = (store_image(url, data, mime), css_size[0], css_size[1])
+        except Exception as e:
+            print(f"Image optimization error for {url}: {str(e)}")
+            optimized_images[url] = (url, css_size[0], css_size[1]) if css_size else (url, None, None)
+
+# Builds an <img> tag with its attributes in alphabetical order; optimized
+# images get their src swapped and explicit width/height
+def render_image(src, alt, style=None):
+    width = height = None
+    if optimize_images:
+        src, width, height = optimized_images.get(src, (src, None, None))
+    tag = '<img alt=' + quote_attr(alt)
+    if height:
+        tag += ' height="' + str(height) + '"'
+    tag += ' src=' + quote_attr(src)
+    if style:
+        tag += ' style=' + quote_attr(style)
+    if width:
+        tag += ' width="' + str(width) + '"'
+    return tag + '/>'
+
+# Appends a tile body (optional icon and text); tiles inside a sub-tile grid
+# carry a listitem role
+def render_tile(out, tile, in_grid=False):
+    out.append('<div class="tile" role="listitem">' if in_grid else '<div class="tile">')
+    if tile.icon:
+        out.append('<div class="tile-icon">' + render_image(tile.icon, '') + '</div>')
+    out.append('<div class="tile-text">' + escape_text(tile.text) + '</div></div>')
+
+# Appends a list of links, used for list pages and list-mode sub-pages
+def render_link_list(out, tiles):
+    out.append('<ul class="sub-link-list" role="list">')
+    for tile in tiles:
+        text = escape_text(tile.text)
+        out.append('<li><a aria-label=' + quote_attr(tile.text) + ' class="tile-link" href=' + quote_attr(tile.href) + ' tabindex="0">' + text + '</a></li>')
+    out.append('</ul>')
+
+# Appends the rows of tiles plus the collapsible sub-tile section of each
+# resolved pocket-guide tile
+def render_tile_rows(out, tiles):
+    section_counter = {}
+    sections = [] # Sub-tile sections follow the row they belong to, so they wait until the row closes
+    for tile_count, tile in enumerate(tiles):
+        if tile_count % 3 == 0:
+            if tile_count:
+                out.append('</div>')
+                out.extend(sections)
+                sections.clear()
+            out.append('<div class="tile-row">')
+        section_id = next_section_id(section_counter, tile.text)
+        if tile.opens_section:
+            render_section_button(out, tile, section_id)
+            sections.append(render_tile_group(tile, section_id))
+        else:
+            out.append('<a aria-label=' + quote_attr(tile.text) + ' class="tile-link" href=' + quote_attr(tile.href) + '>')
+            render_tile(out, tile)
+            out.append('</a>')
+    if tiles:
+        out.append('</div>')
+        out.extend(sections)
+
+# Returns a section ID from the tile text, numbered so repeated labels differ
+def next_section_id(section_counter, text):
+    section_id_base = text.lower().replace(' ', '-')
+    section_counter[section_id_base] = section_counter.get(section_id_base, 0) + 1
+    return f"{section_id_base}-{section_counter[section_id_base]}"
+
+# Appends the button that expands a tile's section
+def render_section_button(out, tile, section_id, in_grid=False):
+    quoted_id = quote_attr(section_id)
+    out.append('<button aria-controls=' + quoted_id + ' aria-expanded="false" aria-label=' + quote_attr(tile.text)
+               + ' class="tile-link navigation-tile" data-section=' + quoted_id
+               + ' onclick=' + quote_attr(f"toggleSection('{section_id}', this)")
+               + ' onkeydown=' + quote_attr(f"handleKeydown(event, '{section_id}', this)") + ' tabindex="0">')
+    render_tile(out, tile, in_grid)
+    out.append('</button>')
+
+# Renders the collapsible section of a pocket-guide tile; sub-tiles with
+# sub-pages of their own get nested sections, so deep hierarchies export in a
+# single page
+def render_tile_group(tile, section_id):
+    sub = ['<section class="tile-group" id=' + quote_attr(section_id) + '><div class="tile-group-container"><h3>' + escape_text(tile.text) + '</h3>']
+    if tile.sub_add_text:
+        sub.append('<div class="sub-add-text"><div>')
+        render_paragraphs(sub, tile.sub_add_text)
+        sub.append('</div></div>')
+    if tile.sub_tiles: # Only add sub-tiles if not text_only (which sets sub_tiles=None)
+        if tile.mode == TileMode.LIST:
+            render_link_list(sub, tile.sub_tiles)
+        else:
+            section_counter = {}
+            nested = []
+            sub.append('<div class="tile-grid" role="list">')
+            for sub_tile in tile.sub_tiles:
+                if sub_tile.opens_section:
+                    nested_id = section_id + '--' + next_section_id(section_counter, sub_tile.text)
+                    render_section_button(sub, sub_tile, nested_id, in_grid=True)
+                    nested.append(render_tile_group(sub_tile, nested_id))
+                    continue
+                sub.append('<a aria-label=' + quote_attr(sub_tile.text) + ' class="tile-link" href=' + quote_attr(sub_tile.href) + ' tabindex="0">')
+                render_tile(sub, sub_tile, in_grid=True)
+                sub.append('</a>')
+            sub.append('</div>')
+            sub.extend(nested)
+    sub.append('</div></section>')
+    return ''.join(sub)
+
+# Renders parsed page data into the ADA template and returns the HTML string
+def render_page(parsed, additional_text):
+    parts, slots = compile_template()
+    title = escape_text(parsed.title)
+    intro = ''
+    if optimize_images:
+        optimize_page_images(parsed)
+    if parsed.top_img:
+        # The explicit height scales with the width to keep the aspect ratio
+        intro = render_image(parsed.top_img, parsed.title, 'width:100%;height:auto;' if optimize_images else 'width:100%;')
+    ada = []
+    if additional_text:
+        ada.append('<div style="max-width:600px; margin:0 auto; text-align:left;">')
+        render_paragraphs(ada, additional_text)
+        ada.append('</div>')
+    nav = []
+    if parsed.is_list_page:
+        render_link_list(nav, parsed.tiles)
+    else:
+        render_tile_rows(nav, parsed.tiles)
+    fragments = {'title': title, 'header_title': title, 'intro': intro,
+                 'ada_info': ''.join(ada), 'navigation_tiles': ''.join(nav)}
+    if 'critical_css' in slots:
+        fragments['critical_css'] = page_critical_css(parts, fragments.values())
+    out = [parts[0]]
+    for slot, part in zip(slots, parts[1:]):
+        out.append(fragments[slot])
+        out.append(part)
+    return ''.join(out)
+
+# Writes an exported page to the output directory without overwriting earlier
+# exports, unless the file_path of an earlier build is given to replace
+def write_export(html, title, out_dir, file_path=None):
+    if file_path is None:
+        sanitized_title = title.replace(' ', '_').replace('/', '_')
         base_filename = f"ADA_{sanitized_title}"
         filename = base_filename + ".html"
-        file_path = os.path.join(output_dir, filename)
+        file_path = os.path.join(out_dir, filename)
         counter = 1
         while os.path.exists(file_path):
             filename = f"{base_filename}_{counter}.html"
-            file_path = os.path.join(output_dir, filename)
+            file_path = os.path.join(out_dir, filename)
             counter += 1
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(str(soup))
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return file_path
+
+# Exports the parsed data to an ADA-compliant HTML file
+def export():
+    try:
+        if not parsed_data:
+            return
+        html = render_page(parsed_data, add_text.get("1.0", tk.END).rstrip('\n'))
+        write_assets(output_dir)
+        file_path = write_export(html, parsed_data.title, output_dir)
         messagebox.showinfo("Export Successful", f"File saved to {file_path}")
     except Exception as e:
         messagebox.showerror("Export Error", f"Error during export: {str(e)}")
@@ -1340,44 +2404,521 @@ def select_output_dir():
         output_dir = dir_path
         messagebox.showinfo("Directory Selected", f"Output directory set to: {dir_path}")
 
-# Sets up the GUI for the application
-root = tk.Tk()
-root.title("ADA Page Converter")
-root.resizable(True, True)
-style = ttk.Style()
-style.theme_use('clam')
-style.configure('TButton', font=('Verdana', 8), padding=5, background='#C99700', foreground='#000')
-style.configure('TLabel', font=('Verdana', 8))
-preview_frame = ttk.Frame(root)
-preview_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
-inner_frame = ttk.Frame(root)
-inner_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=5, pady=5)
-select_dir_btn = ttk.Button(inner_frame, text="Select Output Directory", command=select_output_dir)
-select_dir_btn.pack(pady=2, anchor=tk.W)
-upload_btn = ttk.Button(inner_frame, text="Upload Non-ADA Page", command=start_upload_main_thread)
-upload_btn.pack(pady=2, anchor=tk.W)
-export_btn = ttk.Button(inner_frame, text="Export ADA Page", command=export, state=tk.DISABLED)
-export_btn.pack(pady=2, anchor=tk.W)
-ttk.Label(inner_frame, text="Additional Text (before tiles):").pack(pady=2, anchor=tk.W)
-add_text = tk.Text(inner_frame, height=3, width=20, font=('Verdana', 8))
-add_text.pack(pady=2, anchor=tk.W)
-update_btn = ttk.Button(inner_frame, text="Update Preview", command=lambda: build_preview(parsed_data) if parsed_data else build_template_preview())
-update_btn.pack(pady=2, anchor=tk.W)
-
-# Creates temporary directory for image storage
-temp_dir = tempfile.mkdtemp()
-
-# Initializes template preview
-build_template_preview()
-
-# Cleans up temporary directory on application close
+# Returns the pg_code of a pocket-guide link, or None for any other href
+def get_pg_code(href):
+    if not href.startswith(POCKETGUIDE_PREFIX):
+        return None
+    return href[len(POCKETGUIDE_PREFIX):].split('&')[0].split('#')[0]
+
+# Reads and parses a saved HTML page without any GUI interaction; when a dict
+# is given, the [size, mtime_ns, sha256] fingerprint of the bytes that were
+# parsed is recorded in it under the file path for the build manifest
+def parse_file(file_path, fingerprints=None):
+    stat = os.stat(file_path) # Taken before reading: a file edited mid-read then looks changed on the next run
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    if fingerprints is not None:
+        fingerprints[file_path] = [stat.st_size, stat.st_mtime_ns, hashlib.sha256(data).hexdigest()]
+    # Same text as reading in text mode: undecodable bytes replaced and line
+    # endings translated
+    html_content = data.decode('utf-8', errors='replace').replace('\r\n', '\n').replace('\r', '\n')
+    return parse_page_cached(html_content)
+
+# Expands the command-line inputs (directories, globs or files) into a sorted
+# list of HTML files
+def collect_input_files(inputs):
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, '*.html')) + glob.glob(os.path.join(item, '*.htm'))
+        else:
+            matches = glob.glob(item)
+        for path in matches:
+            if os.path.isfile(path):
+                files.append(os.path.abspath(path))
+    return sorted(set(files))
+
+# Index of saved sub-pages by pg_code: explicit map entries first, then
+# <pg_code>.html (or .htm) in the scanned directories
+class PageStore:
+    def __init__(self, directories=(), pg_map=None):
+        self.pg_map = dict(pg_map or {})
+        self.directories = [] # Searched in order after a page's own directory
+        self.pages = {} # Directory -> {pg_code: path} from its last scan
+        self.mtimes = {} # Directory -> modification time at its last scan
+        for directory in directories:
+            self.add_directory(directory)
+
+    # Adds a directory to the search path and scans it once
+    def add_directory(self, directory):
+        directory = os.path.abspath(directory)
+        if directory not in self.directories:
+            self.directories.append(directory)
+        self.scan(directory)
+
+    # Lists a directory only when it is new or its contents changed since the
+    # last scan of it
+    def scan(self, directory):
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            mtime = None
+        if directory in self.pages and self.mtimes.get(directory) == mtime:
+            return
+        pages = {}
+        if mtime is not None:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    pg_code, ext = os.path.splitext(entry.name)
+                    if ext in ('.html', '.htm') and (ext == '.html' or pg_code not in pages) and entry.is_file():
+                        pages[pg_code] = entry.path
+            pages.update(load_saved_pg_map(directory))
+        self.pages[directory] = pages
+        self.mtimes[directory] = mtime
+
+    # Picks up files added or removed since the last scan
+    def refresh(self):
+        for directory in list(self.pages):
+            self.scan(directory)
+
+    # Records a sub-page chosen by hand so later pages linking to the same
+    # pg_code resolve automatically
+    def add(self, pg_code, path):
+        self.pg_map[pg_code] = path
+
+    # Returns the saved file for a pg_code, looking next to the page being
+    # converted before the shared directories
+    def find(self, pg_code, near=None):
+        if pg_code in self.pg_map:
+            return self.pg_map[pg_code]
+        if near is not None:
+            near = os.path.abspath(near)
+            if near not in self.pages:
+                self.scan(near)
+            path = self.pages[near].get(pg_code)
+            if path:
+                return path
+        for directory in self.directories:
+            path = self.pages[directory].get(pg_code)
+            if path:
+                return path
+        return None
+
+# Reads the pg_map.json HTMLSaverwlabel keeps next to the pages it saves under
+# their logical names; returns pg_code -> path for the files that still exist
+def load_saved_pg_map(directory):
+    try:
+        with open(os.path.join(directory, SAVED_PG_MAP_NAME), 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Could not read {SAVED_PG_MAP_NAME} in {directory}: {str(e)}")
+        return {}
+    paths = {pg_code: os.path.join(directory, name) for pg_code, name in saved.items()}
+    return {pg_code: path for pg_code, path in paths.items() if os.path.isfile(path)}
+
+# Returns the page store shared by the GUI, creating an empty one on first use
+def get_page_store():
+    global page_store
+    if page_store is None:
+        page_store = PageStore()
+    return page_store
+
+# Outcome of crawling the pocket-guide links below one page
+@dataclass(slots=True)
+class Crawl:
+    top: list # (tile, pg_code, Page or None) for each pending tile of the root page, left for the caller to attach
+    pages: dict # pg_code -> its parsed Page, or None when the store has no saved page for it
+    paths: dict # pg_code -> the saved file it resolved to, or None
+    nears: dict # pg_code -> the directory its file was looked up next to, that of the first page linking to it
+    graph: dict # pg_code -> the pg_codes its tiles link to, in tile order; the root page is under its own pg_code (None if unknown)
+    cycles: list # (pg_code, linked pg_code) pairs not attached because the link leads back to a page above it
+
+    # Returns the pg_codes with no saved page, in the order first linked
+    def unresolved(self):
+        return [pg_code for pg_code, page in self.pages.items() if page is None]
+
+    # Returns the crawl without any parsed pages, small enough to send back
+    # from a worker process
+    def summary(self):
+        return {'graph': self.graph, 'cycles': self.cycles, 'unresolved': self.unresolved(), 'sources': self.paths, 'near': self.nears}
+
+# Parses the saved files found for a set of pg_codes, several at once; returns
+# pg_code -> Page or None
+def parse_sub_pages(paths, fingerprints=None):
+    global sub_page_executor
+    unique_paths = list(dict.fromkeys(path for path in paths.values() if path)) # Codes mapped to the same file parse it once
+    if len(unique_paths) > 1:
+        if sub_page_executor is None:
+            sub_page_executor = ThreadPoolExecutor(max_workers=SUB_PAGE_WORKERS, thread_name_prefix='sub-page')
+        results = dict(zip(unique_paths, sub_page_executor.map(lambda path: parse_file(path, fingerprints), unique_paths)))
+    else:
+        results = {path: parse_file(path, fingerprints) for path in unique_paths}
+    return {pg_code: results.get(path) if path else None for pg_code, path in paths.items()}
+
+# Walks the whole pg_code graph below a page, parsing each linked page once,
+# level by level, and attaching every page below the first level to the tiles
+# that link to it; links that would close a cycle are recorded and left
+# unattached. Fingerprints of the files read are added to fingerprints if given
+def crawl_pages(parsed, store, near=None, root_code=None, fingerprints=None):
+    store.refresh()
+    pages = {}
+    paths = {}
+    nears = {}
+    graph = {}
+    frontier = [(root_code, parsed, near)]
+    while frontier:
+        wanted = {} # pg_code -> directory of the first page linking to it, where its own file is looked for first
+        for pg_code, page, page_dir in frontier:
+            links = list(dict.fromkeys(get_pg_code(tile.href) for tile in page.pending_tiles()))
+            graph[pg_code] = links
+            for link in links:
+                if link not in pages and link != root_code:
+                    wanted.setdefault(link, page_dir)
+        found = {pg_code: store.find(pg_code, page_dir) for pg_code, page_dir in wanted.items()}
+        paths.update(found)
+        nears.update(wanted)
+        pages.update(parse_sub_pages(found, fingerprints))
+        frontier = [(pg_code, pages[pg_code], os.path.dirname(found[pg_code])) for pg_code in wanted if pages[pg_code]]
+    cycles = []
+    state = {} # pg_code -> 'open' while its links are being attached, 'done' afterwards
+    def attach_links(pg_code, page):
+        state[pg_code] = 'open'
+        for tile in page.pending_tiles():
+            link = get_pg_code(tile.href)
+            if link == root_code or state.get(link) == 'open':
+                cycles.append((pg_code, link))
+                continue
+            sub_parsed = pages.get(link)
+            if sub_parsed is None:
+                continue
+            if link not in state:
+                attach_links(link, sub_parsed)
+            if page is not parsed:
+                attach_sub_page(page, tile, sub_parsed)
+        state[pg_code] = 'done'
+    attach_links(root_code, parsed)
+    top = [(tile, get_pg_code(tile.href), pages.get(get_pg_code(tile.href))) for tile in parsed.pending_tiles()]
+    return Crawl(top, pages, paths, nears, graph, cycles)
+
+# Attaches a parsed sub-page to a tile and picks the matching list/tiles mode
+def attach_sub_page(parsed, tile, sub_parsed):
+    tile.sub_page = SubPage(sub_parsed.title, sub_parsed.tiles, sub_parsed.is_list_page)
+    tile.mode = TileMode.LIST if tile.sub_is_list else TileMode.TILES
+    parsed.update_pending(tile)
+
+# Attaches sub-pages at every depth to a page's pocket-guide tiles, falling
+# back to a direct link for a missing first-level sub-page; returns the Crawl
+def resolve_sub_pages(parsed, store, near=None, root_code=None, fingerprints=None):
+    crawl = crawl_pages(parsed, store, near, root_code, fingerprints)
+    for tile, pg_code, sub_parsed in crawl.top:
+        if not sub_parsed:
+            tile.use_direct = True
+            tile.mode = TileMode.DIRECT
+            parsed.update_pending(tile)
+        else:
+            attach_sub_page(parsed, tile, sub_parsed)
+    return crawl
+
+# Parses one saved page with its sub-pages and renders the ADA page; returns
+# the title, HTML, per-stage timings in milliseconds and the crawl summary,
+# whose 'files' holds the fingerprint of every file as it was read
+def render_file(file_path, additional_text='', store=None):
+    timings = {}
+    fingerprints = {}
+    start = time.perf_counter()
+    parsed = parse_file(file_path, fingerprints)
+    timings['parse'] = (time.perf_counter() - start) * 1000
+    if not parsed:
+        raise ValueError("page could not be parsed")
+    start = time.perf_counter()
+    root_code = os.path.splitext(os.path.basename(file_path))[0] # Saved pages are named after their pg_code, so links back to this page count as cycles
+    crawl = resolve_sub_pages(parsed, store or get_page_store(), os.path.dirname(file_path), root_code, fingerprints)
+    timings['sub_pages'] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    html = render_page(parsed, additional_text)
+    timings['export'] = (time.perf_counter() - start) * 1000
+    links = crawl.summary()
+    links['files'] = fingerprints
+    return parsed.title, html, timings, links
+
+# Worker entry point for the process pool; errors are returned instead of
+# raised so one bad page does not stop the batch
+def render_job(job):
+    file_path, additional_text = job
+    try:
+        # The fingerprints in links['files'] were taken as each file was read,
+        # so the manifest describes the inputs this output was built from
+        title, html, timings, links = render_file(file_path, additional_text, page_store)
+        return title, html, timings, links, None
+    except Exception as e:
+        return None, None, None, None, str(e)
+
+# Identifies everything besides the input files that shapes an export:
+# template, CSS, asset options, parser and renderer versions
+def build_version():
+    digest = hashlib.sha256()
+    for part in (template_html, css_string, asset_mode, str(critical_css), str(optimize_images), str(PARSER_VERSION), str(RENDER_VERSION)):
+        digest.update(part.encode('utf-8'))
+    return digest.hexdigest()
+
+# Checks a file against its recorded fingerprint, hashing it only when its size
+# or modification time moved
+def fingerprint_matches(path, fingerprint):
+    try:
+        stat = os.stat(path)
+        if [stat.st_size, stat.st_mtime_ns] == fingerprint[:2]:
+            return True
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest() == fingerprint[2]
+    except OSError:
+        return False
+
+# Loads the build manifest of an output directory: input page -> what its
+# export was built from
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# Saves the build manifest through a temporary file so an interrupted run never
+# leaves it half written
+def save_manifest(out_dir, manifest):
+    write_file_atomic(os.path.join(out_dir, MANIFEST_NAME), json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'))
+
+# True when a page's recorded export still matches its inputs: same build
+# version and additional text, every pg_code still resolving to the same file
+# (or still to none), unchanged input files and an output that still exists
+def is_up_to_date(entry, file_path, version, text_hash, store, out_dir):
+    if not entry or entry.get('version') != version or entry.get('additional_text') != text_hash:
+        return False
+    if not os.path.isfile(os.path.join(out_dir, entry['output'])):
+        return False
+    near = os.path.dirname(file_path)
+    nears = entry.get('near', {})
+    if any(store.find(pg_code, nears.get(pg_code, near)) != path for pg_code, path in entry['sources'].items()):
+        return False
+    return all(fingerprint_matches(path, fingerprint) for path, fingerprint in entry['files'].items())
+
+# Applies the parent's cache settings, page store, asset mode and image options
+# inside each worker process
+def init_worker(use_parse_cache, store, assets, critical, images, out_dir):
+    global parse_cache_enabled, page_store, asset_mode, critical_css, optimize_images, image_out_dir
+    parse_cache_enabled = use_parse_cache
+    page_store = store
+    asset_mode = assets
+    critical_css = critical
+    optimize_images = images
+    if out_dir != image_out_dir:
+        optimized_images.clear()
+        image_out_dir = out_dir
+
+# Converts pages across a process pool and yields (file_path, out_path,
+# timings, crawl summary, error) in input order; pages whose inputs are
+# unchanged since the last run are not rebuilt and come back with timings None
+def convert_files(files, out_dir, additional_text='', store=None, jobs=None, force=False):
+    jobs = jobs or os.cpu_count() or 1
+    store = store or PageStore()
+    for directory in sorted({os.path.dirname(file_path) for file_path in files}):
+        store.scan(os.path.abspath(directory))
+    write_assets(out_dir)
+    manifest = load_manifest(out_dir)
+    version = build_version()
+    text_hash = hashlib.sha256(additional_text.encode('utf-8')).hexdigest()
+    stale = [file_path for file_path in files
+             if force or not is_up_to_date(manifest.get(file_path), file_path, version, text_hash, store, out_dir)]
+    work = [(file_path, additional_text) for file_path in stale]
+    if jobs == 1 or len(work) < 2:
+        init_worker(parse_cache_enabled, store, asset_mode, critical_css, optimize_images, out_dir)
+        results = map(render_job, work)
+        executor = None
+    else:
+        # The store is scanned here once and copied to each worker rather than
+        # rescanned per page
+        executor = ProcessPoolExecutor(max_workers=min(jobs, len(work)), initializer=init_worker, initargs=(parse_cache_enabled, store, asset_mode, critical_css, optimize_images, out_dir))
+        # Results come back in input order, so files are written (and named)
+        # deterministically
+        results = executor.map(render_job, work, chunksize=max(1, len(work) // (jobs * 4)))
+    stale_set = set(stale)
+    try:
+        for file_path in files:
+            entry = manifest.get(file_path)
+            if file_path not in stale_set:
+                yield file_path, os.path.join(out_dir, entry['output']), None, entry, None
+                continue
+            title, html, timings, links, error = next(results)
+            if error:
+                yield file_path, None, None, None, error
+                continue
+            start = time.perf_counter()
+            # A page built before is rewritten in place rather than numbered
+            out_path = write_export(html, title, out_dir, os.path.join(out_dir, entry['output']) if entry else None)
+            timings['write'] = (time.perf_counter() - start) * 1000
+            links.update({'output': os.path.basename(out_path), 'version': version, 'additional_text': text_hash})
+            manifest[file_path] = links
+            yield file_path, out_path, timings, links, None
+    finally:
+        save_manifest(out_dir, manifest)
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+# Times parse_page against parse_page_soup on each file and checks that both
+# return the same dict
+def benchmark_parsers(files, repeat=5):
+    mismatches = 0
+    total_fast = 0.0
+    total_soup = 0.0
+    for file_path in files:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            html_content = f.read()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fast = parse_page(html_content)
+        fast_time = (time.perf_counter() - start) / repeat
+        start = time.perf_counter()
+        for _ in range(repeat):
+            try:
+                reference = parse_page_soup(html_content)
+            except Exception:
+                reference = None
+        soup_time = (time.perf_counter() - start) / repeat
+        total_fast += fast_time
+        total_soup += soup_time
+        same = fast == reference
+        if not same:
+            mismatches += 1
+        print(f"{os.path.basename(file_path)}: lxml {fast_time * 1000:.2f} ms, BeautifulSoup {soup_time * 1000:.2f} ms, "
+              f"{soup_time / fast_time if fast_time else 0:.1f}x {'identical' if same else 'MISMATCH'}")
+    if total_fast:
+        print(f"Total: lxml {total_fast * 1000:.1f} ms, BeautifulSoup {total_soup * 1000:.1f} ms, {total_soup / total_fast:.1f}x faster, {mismatches} mismatches")
+    return 1 if mismatches else 0
+
+# Runs the converter headless over whole directories of saved pages
+def run_batch(argv):
+    global parse_cache_enabled, asset_mode, critical_css, optimize_images
+    parser = argparse.ArgumentParser(description="Convert saved campusM pages to ADA pages without the GUI.")
+    parser.add_argument('inputs', nargs='+', help="HTML files, directories or glob patterns to convert")
+    parser.add_argument('-o', '--output-dir', default=output_dir, help="directory for exported ADA pages (default: %(default)s)")
+    parser.add_argument('--sub-dir', action='append', default=[], help="extra directory searched for <pg_code>.html sub-pages (repeatable)")
+    parser.add_argument('--pg-map', help="JSON file mapping pg_code values to saved HTML files")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="number of worker processes (default: one per CPU core)")
+    parser.add_argument('--dep-graph', help="write the pg_code dependency graph of every page to this JSON file")
+    parser.add_argument('--add-text-file', help="text file inserted as additional text before the tiles of every page")
+    parser.add_argument('--assets', choices=ASSET_MODES, default=asset_mode, help="inline the minified CSS/JS in every page, or link shared content-hashed files (default: %(default)s)")
+    parser.add_argument('--critical-css', action='store_true', help="inline only the CSS rules each page uses and load the full stylesheet after first paint")
+    parser.add_argument('--optimize-images', choices=IMAGE_FORMATS, help="resize icons and the banner to their rendered size, re-encode them in this format and inline the small ones")
+    parser.add_argument('--force', action='store_true', help="rebuild every page even if the build manifest says its inputs are unchanged")
+    parser.add_argument('--no-parse-cache', action='store_true', help="always re-parse pages instead of using the on-disk parse cache")
+    parser.add_argument('--benchmark-parse', action='store_true', help="compare the lxml and BeautifulSoup parsers on the inputs instead of converting")
+    args = parser.parse_args(argv)
+    parse_cache_enabled = not args.no_parse_cache
+    asset_mode = args.assets
+    critical_css = args.critical_css
+    optimize_images = args.optimize_images
+    pg_map = {}
+    if args.pg_map:
+        with open(args.pg_map, 'r', encoding='utf-8') as f:
+            base = os.path.dirname(os.path.abspath(args.pg_map))
+            pg_map = {code: os.path.join(base, path) for code, path in json.load(f).items()}
+    additional_text = ''
+    if args.add_text_file:
+        with open(args.add_text_file, 'r', encoding='utf-8') as f:
+            additional_text = f.read().rstrip('\n')
+    files = collect_input_files(args.inputs)
+    if not files:
+        print("No HTML files found.")
+        return 1
+    if args.benchmark_parse:
+        return benchmark_parsers(files)
+    os.makedirs(args.output_dir, exist_ok=True)
+    failures = 0
+    skipped = 0
+    batch_start = time.perf_counter()
+    store = PageStore(args.sub_dir, pg_map)
+    dependency_graphs = {}
+    for file_path, out_path, timings, links, error in convert_files(files, args.output_dir, additional_text, store, args.jobs, args.force):
+        if error:
+            failures += 1
+            print(f"FAILED {file_path}: {error}")
+            continue
+        dependency_graphs[file_path] = {key: links[key] for key in ('graph', 'cycles', 'unresolved')}
+        if timings is None:
+            skipped += 1
+            print(f"{os.path.basename(file_path)} -> {os.path.basename(out_path)} (up to date)")
+            continue
+        print(f"{os.path.basename(file_path)} -> {os.path.basename(out_path)} "
+              f"(parse {timings['parse']:.1f} ms, sub-pages {timings['sub_pages']:.1f} ms, export {timings['export']:.1f} ms, write {timings['write']:.1f} ms)")
+        if links['unresolved']:
+            print(f"    no sub-page found for pg_code {', '.join(links['unresolved'])}; exported as direct links")
+        if links['cycles']:
+            print(f"    links back up the hierarchy left as plain links: {', '.join(f'{a} -> {b}' for a, b in links['cycles'])}")
+    if args.dep_graph:
+        with open(args.dep_graph, 'w', encoding='utf-8') as f:
+            json.dump(dependency_graphs, f, indent=2)
+    total = time.perf_counter() - batch_start
+    print(f"Converted {len(files) - failures - skipped} of {len(files)} pages ({skipped} up to date) in {total:.2f} s")
+    return 1 if failures else 0
+
+# Stops pending icon downloads and decodes on application close; downloaded
+# icons stay in the persistent cache
 def cleanup():
     try:
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
+        for executor in (icon_executor, image_executor, sub_page_executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
     except Exception as e:
         print(f"Cleanup error: {str(e)}")
     root.destroy()
 
-root.protocol("WM_DELETE_WINDOW", cleanup)
-root.mainloop()
\ No newline at end of file
+# Runs in batch mode when given command-line arguments, else starts the GUI
+if __name__ == '__main__' and len(sys.argv) > 1:
+    sys.exit(run_batch(sys.argv[1:]))
+
+if __name__ == '__main__':
+    # Sets up the GUI for the application
+    root = tk.Tk()
+    root.title("ADA Page Converter")
+    root.resizable(True, True)
+    style = ttk.Style()
+    style.theme_use('clam')
+    style.configure('TButton', font=('Verdana', 8), padding=5, background='#C99700', foreground='#000')
+    style.configure('TLabel', font=('Verdana', 8))
+    preview_container = ttk.Frame(root)
+    preview_container.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
+    preview_canvas = tk.Canvas(preview_container, width=420, height=600, highlightthickness=0, borderwidth=0)
+    preview_scrollbar = ttk.Scrollbar(preview_container, orient=tk.VERTICAL, command=preview_canvas.yview)
+    preview_canvas.configure(yscrollcommand=preview_scrollbar.set)
+    preview_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    preview_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    preview_frame = ttk.Frame(preview_canvas)
+    preview_window = preview_canvas.create_window((0, 0), window=preview_frame, anchor=tk.NW)
+    preview_frame.bind('<Configure>', lambda e: preview_canvas.configure(scrollregion=preview_canvas.bbox('all')))
+    preview_canvas.bind('<Configure>', lambda e: preview_canvas.itemconfigure(preview_window, width=e.width))
+    root.bind_all('<MouseWheel>', scroll_preview)
+    root.bind_all('<Button-4>', scroll_preview)
+    root.bind_all('<Button-5>', scroll_preview)
+    inner_frame = ttk.Frame(root)
+    inner_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=5, pady=5)
+    select_dir_btn = ttk.Button(inner_frame, text="Select Output Directory", command=select_output_dir)
+    select_dir_btn.pack(pady=2, anchor=tk.W)
+    upload_btn = ttk.Button(inner_frame, text="Upload Non-ADA Page", command=start_upload_main_thread)
+    upload_btn.pack(pady=2, anchor=tk.W)
+    sub_dir_btn = ttk.Button(inner_frame, text="Select Sub-Page Folder", command=select_sub_page_dir)
+    sub_dir_btn.pack(pady=2, anchor=tk.W)
+    export_btn = ttk.Button(inner_frame, text="Export ADA Page", command=export, state=tk.DISABLED)
+    export_btn.pack(pady=2, anchor=tk.W)
+    ttk.Label(inner_frame, text="Additional Text (before tiles):").pack(pady=2, anchor=tk.W)
+    add_text = tk.Text(inner_frame, height=3, width=20, font=('Verdana', 8))
+    add_text.pack(pady=2, anchor=tk.W)
+    update_btn = ttk.Button(inner_frame, text="Update Preview", command=lambda: build_preview(parsed_data) if parsed_data else build_template_preview())
+    update_btn.pack(pady=2, anchor=tk.W)
+
+    # Initializes template preview and starts collecting decoded icons
+    build_template_preview()
+    poll_image_results()
+
+    root.protocol("WM_DELETE_WINDOW", cleanup)
+    root.mainloop()
@@ -2,6 +2,14 @@ import tkinter as tk
 from tkinter import filedialog
 import re
 import os
+import sys
+import time
+import argparse
+import codecs
+import json
+import shutil
+import socketserver
+import threading
 from datetime import datetime
 import requests
 from io import BytesIO
@@ -13,42 +21,168 @@ GRAY = '#888B8D'
 BLACK = '#000000'
 WHITE = '#FFFFFF'
 
+DEFAULT_OUTPUT_FOLDER = os.path.expanduser("~/Desktop/htmlscripts/scripts")
 
-def get_logical_name(html_content: str) -> str:
+# Headless ingestion settings
+INBOX_SETTLE_SECONDS = 0.5        # Inbox files modified more recently than this may still be being written
+INBOX_POLL_SECONDS = 1.0          # Pause between inbox scans when nothing is waiting
+STREAM_CHUNK_SIZE = 64 * 1024     # Read size for stdin and socket documents
+MAX_DOCUMENT_BYTES = 64 * 1024 * 1024  # Larger socket documents are refused
+SOCKET_TIMEOUT_SECONDS = 30       # A socket client silent for this long is disconnected
+
+BENCHMARK_BASELINE_MAX_BOLD = 128 * 1024  # Largest 'bold' benchmark page the quadratic original searches are timed on
+
+# Next counter to try for each (folder, base name), so a burst of same-named
+# pages does not re-probe every earlier file
+name_counters = {}
+save_lock = threading.Lock()  # Serializes saves from socket connections
+
+# Saved pages keep their logical names, so the pg_code of each page saved with
+# one is listed in this file next to it; the ADA converter reads it
+PG_MAP_NAME = 'pg_map.json'
+pg_map_lock = threading.Lock()
+
+# A capture script can tag a document with its pg_code by starting it with a
+# comment such as <!-- pg_code: XYZ -->
+PG_CODE_COMMENT = re.compile(r'\s*<!--\s*pg_code\s*[:=]\s*([^\s<>]+)\s*-->')
+
+
+# Logical-name patterns in priority order: the first one that matches anywhere
+# in the page names it
+NAME_PATTERNS = [
+    re.compile(r'<div class="exlheader"><b[^>]*>(.+?)</b></div>', re.DOTALL),
+    re.compile(r'<div class="sectiontext">(.+?)</div>', re.DOTALL),
+    re.compile(r'<title>(.+?)</title>', re.DOTALL),
+    re.compile(r'<h1>(.+?)</h1>', re.DOTALL),
+    re.compile(r'<b[^>]*>([^<]+)</b>', re.DOTALL),
+]
+
+# Opening text of each name pattern but the last; a pattern is only tried where
+# its opening text occurs
+NAME_OPENERS = ['<div class="exlheader">', '<div class="sectiontext">', '<title>', '<h1>']
+
+# Closing text each of those patterns needs somewhere after its opening text;
+# once it no longer occurs the pattern is done
+NAME_TERMINATORS = ['</b></div>', '</div>', '</title>', '</h1>']
+
+# What the last name pattern, <b[^>]*>([^<]+)</b>, needs after the '>' that
+# ends the opening tag
+BOLD_TEXT_TAIL = re.compile(r'([^<]+)</b>')
+
+TILE_MARKER = 'class="child w3-card tile"'
+LIST_MARKER = 'class="w3-table w3-striped w3-bordered w3-border"'
+
+INVALID_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+WHITESPACE_RUN = re.compile(r'\s+')
+
+
+def classify_html(html_content: str) -> tuple:
     """
-    Extract a logical name from the HTML content based on priority patterns.
+    Find the raw logical name and the page type of an HTML document in linear time.
     
-    This function searches for specific HTML elements in order of priority to derive
-    a meaningful filename. If no patterns match, it falls back to a timestamp-based name.
+    Gives the same results as searching for each name pattern in priority order and then
+    for the tile and list markers. Each pattern is only tried where its opening text occurs,
+    found with plain substring searches, and is dropped as soon as its closing text no longer
+    occurs further on; the bold-text fallback is handled by first_bold_text. Every pattern
+    therefore walks the page at most once, and the walk stops at the first decisive match.
+    The list check looks for the table class after the first <table instead of letting
+    '<table.*' backtrack over the rest of the page.
     
     Args:
         html_content (str): The HTML string to analyze.
     
     Returns:
-        str: A cleaned, valid filename string.
+        tuple: The unstripped name (or None if no pattern matches) and the page type
+            ('tile', 'list', or 'text').
     """
-    patterns = [
-        r'<div class="exlheader"><b[^>]*>(.+?)</b></div>',
-        r'<div class="sectiontext">(.+?)</div>',
-        r'<title>(.+?)</title>',
-        r'<h1>(.+?)</h1>',
-        r'<b[^>]*>([^<]+)</b>'
-    ]
-    
-    for pattern in patterns:
-        if match := re.search(pattern, html_content, re.DOTALL):
-            name = match.group(1).strip()
+    name = None
+    for pattern, opener, terminator in zip(NAME_PATTERNS, NAME_OPENERS, NAME_TERMINATORS):
+        terminator_at = 0  # Last known position of the closing text, -1 once none is left
+        pos = html_content.find(opener)
+        while pos >= 0:
+            if match := pattern.match(html_content, pos):
+                name = match.group(1)
+                break
+            end = pos + len(opener)
+            if terminator_at <= end:
+                terminator_at = html_content.find(terminator, end + 1)
+                if terminator_at < 0:
+                    break
+            pos = html_content.find(opener, pos + 1)
+        if name is not None:
             break
     else:
+        name = first_bold_text(html_content)
+
+    if TILE_MARKER in html_content:
+        page_type = "tile"
+    elif (table_at := html_content.find('<table')) >= 0 and html_content.find(LIST_MARKER, table_at + 6) >= 0:
+        page_type = "list"
+    else:
+        page_type = "text"
+    return name, page_type
+
+
+def first_bold_text(html_content: str) -> str:
+    """
+    Find the first match of the bold-text name pattern, <b[^>]*>([^<]+)</b>, in linear time.
+    
+    The '[^>]*>' part always ends at the first '>' after an opener, so every opener before
+    the same '>' shares one outcome. The tail after each '>' is checked once, and when it does
+    not match, every opener up to that '>' is skipped together. Trying the pattern at each
+    opener instead rescans the same tag from every one of them.
+    
+    Args:
+        html_content (str): The HTML string to analyze.
+    
+    Returns:
+        str: The unstripped bold text, or None if the pattern does not match.
+    """
+    pos = html_content.find('<b')
+    while pos >= 0:
+        tag_end = html_content.find('>', pos + 2)
+        if tag_end < 0:
+            return None
+        if match := BOLD_TEXT_TAIL.match(html_content, tag_end + 1):
+            return match.group(1)
+        pos = html_content.find('<b', tag_end + 1)
+    return None
+
+
+def clean_name(name: str) -> str:
+    """
+    Turn a raw logical name into a filename, falling back to a timestamp when there is none.
+    
+    Args:
+        name (str): The name found in the page, or None.
+    
+    Returns:
+        str: A cleaned, valid filename string.
+    """
+    if name is None:
         # Fallback: Use current timestamp for uniqueness
-        name = f"HTML_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        return f"HTML_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
     # Clean the name for filesystem compatibility
-    name = re.sub(r'[<>:"/\\|?*]', '', name)  # Remove invalid filename characters
-    name = re.sub(r'\s+', '_', name)          # Replace whitespace with underscores
-    name = name[:50]                          # Truncate to reasonable length
+    name = INVALID_FILENAME_CHARS.sub('', name.strip())  # Remove invalid filename characters
+    name = WHITESPACE_RUN.sub('_', name)                 # Replace whitespace with underscores
+    return name[:50]                                     # Truncate to reasonable length
 
-    return name
+
+def get_logical_name(html_content: str) -> str:
+    """
+    Extract a logical name from the HTML content based on priority patterns.
+    
+    This function searches for specific HTML elements in order of priority to derive
+    a meaningful filename. If no patterns match, it falls back to a timestamp-based name.
+    
+    Args:
+        html_content (str): The HTML string to analyze.
+    
+    Returns:
+        str: A cleaned, valid filename string.
+    """
+    return clean_name(classify_html(html_content)[0])
 
 
 def detect_page_type(html_content: str) -> str:
@@ -64,27 +198,21 @@ def detect_page_type(html_content: str) -> str:
     Returns:
         str: The detected page type ('tile', 'list', or 'text').
     """
-    # Pre-compile regex patterns for efficiency
-    tile_pattern = re.compile(r'class="child w3-card tile"', re.DOTALL)
-    list_pattern = re.compile(r'<table.*class="w3-table w3-striped w3-bordered w3-border"', re.DOTALL)
+    return classify_html(html_content)[1]
 
-    if tile_pattern.search(html_content):
-        return "tile"
-    elif list_pattern.search(html_content):
-        return "list"
-    else:
-        return "text"
 
-
-def save_html(content: str, folder: str) -> str:
+def save_html(content: str, folder: str, pg_code: str = None) -> str:
     """
     Save the HTML content to a file in the specified folder with a logical name and type suffix.
     
-    Generates a unique filename by appending a counter if conflicts occur.
+    Generates a unique filename by appending a counter if conflicts occur. When the page's
+    pg_code is known, given here or in a leading <!-- pg_code: ... --> comment, the saved
+    file is recorded under it in the folder's pg_map.json.
     
     Args:
         content (str): The HTML content to save.
         folder (str): The directory path to save the file.
+        pg_code (str): The page's pg_code, if known.
     
     Returns:
         str: A message indicating success or error.
@@ -92,101 +220,450 @@ def save_html(content: str, folder: str) -> str:
     if not content:
         return "No content to save."
 
-    base_name = get_logical_name(content)
-    page_type = detect_page_type(content)
+    name, page_type = classify_html(content)
+    base_name = clean_name(name)
     base_name_with_type = f"{base_name}_{page_type}"
     
-    counter = 0
-    file_path = os.path.join(folder, f"{base_name_with_type}.html")
-    
-    # Ensure filename uniqueness by incrementing counter
-    while os.path.exists(file_path):
-        counter += 1
-        file_path = os.path.join(folder, f"{base_name_with_type}_{counter}.html")
+    key = (folder, base_name_with_type)
+    counter = name_counters.get(key, 0)
     
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+    # Ensure filename uniqueness by incrementing counter; exclusive creation
+    # never overwrites a file that another saver created after the check
+    while True:
+        suffix = f"_{counter}" if counter else ""
+        file_path = os.path.join(folder, f"{base_name_with_type}{suffix}.html")
+        try:
+            with open(file_path, 'x', encoding='utf-8') as f:
+                f.write(content)
+        except FileExistsError:
+            counter += 1
+            continue
+        except Exception as e:
+            return f"Error saving file: {str(e)}"
+        name_counters[key] = counter + 1
+        break
+
+    if pg_code is None and (match := PG_CODE_COMMENT.match(content)):
+        pg_code = match.group(1)
+    if not pg_code:
         return f"Saved as: {file_path}"
+    try:
+        record_pg_code(folder, pg_code, file_path)
     except Exception as e:
-        return f"Error saving file: {str(e)}"
-
-
-# Initialize the main GUI window
-root = tk.Tk()
-root.title("HTML Input Collector")
-root.configure(bg=WHITE)
-
-# Load and display MCC logo with fallback to text label
-logo_url = "https://www.monroecc.edu/fileadmin/SiteFiles/GeneralContent/depts/brand-toolkit/images/2015_logos/horizontal_logos/MCC_logo_horiz_color_rgb.png"
-try:
-    response = requests.get(logo_url, timeout=5)  # Add timeout for better reliability
-    response.raise_for_status()
-    img_data = BytesIO(response.content)
-    img = Image.open(img_data)
-    img = img.resize((300, 75), Image.LANCZOS)
-    photo = ImageTk.PhotoImage(img)
-    logo_label = tk.Label(root, image=photo, bg=WHITE)
-    logo_label.image = photo  # Retain reference to prevent garbage collection
-    logo_label.pack(pady=10)
-except Exception as e:
-    print(f"Error loading logo: {e}")
-    fallback_label = tk.Label(root, text="Monroe Community College", font=("Arial", 16, "bold"), bg=WHITE, fg=BLACK)
-    fallback_label.pack(pady=10)
-
-# Set up output folder selection with default path
-output_folder = tk.StringVar(value=os.path.expanduser("~/Desktop/htmlscripts/scripts"))
-
-def choose_folder():
-    """Open a directory selection dialog and update the output folder."""
-    folder = filedialog.askdirectory()
-    if folder:
-        output_folder.set(folder)
-        folder_label.config(text=f"Output Folder: {folder}")
-
-choose_button = tk.Button(root, text="Choose Folder", command=choose_folder, bg=GOLD, fg=BLACK, activebackground=GRAY, activeforeground=WHITE)
-choose_button.pack(pady=10)
-
-folder_label = tk.Label(root, text=f"Output Folder: {output_folder.get()}", bg=WHITE, fg=BLACK, wraplength=600)  # Add wraplength for long paths
-folder_label.pack()
-
-# Create text widget for HTML input
-html_text = tk.Text(root, height=15, width=80, wrap='word', bg=WHITE, fg=BLACK)
-html_text.pack(pady=10)
-
-# Create console for logging messages
-console = tk.Text(root, height=10, width=80, state='disabled', wrap='word', bg=GRAY, fg=BLACK)
-console.pack(pady=10)
-
-def log_message(message: str):
-    """Log a message to the console widget."""
-    console.config(state='normal')
-    console.insert(tk.END, f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}\n")  # Add timestamp for better logging
-    console.see(tk.END)
-    console.config(state='disabled')
-
-# Bind paste event to process HTML after a short delay
-def on_paste(event):
-    root.after(100, process_html)
-
-def process_html():
-    """Process and save pasted HTML content, then clear the input."""
-    content = html_text.get("1.0", tk.END).strip()
-    if content:
-        folder = output_folder.get()
-        os.makedirs(folder, exist_ok=True)  # Ensure folder exists
+        return f"Saved as: {file_path} (pg_code not recorded: {str(e)})"
+    return f"Saved as: {file_path} (pg_code {pg_code})"
+
+
+def record_pg_code(folder: str, pg_code: str, file_path: str):
+    """
+    Record a saved page under its pg_code in the folder's pg_map.json.
+    
+    The map is rewritten through a temporary file, so readers never see it half written
+    and the folder's modification time changes, which tells the converter to rescan it.
+    
+    Args:
+        folder (str): The folder the page was saved in.
+        pg_code (str): The page's pg_code.
+        file_path (str): The saved file.
+    """
+    map_path = os.path.join(folder, PG_MAP_NAME)
+    with pg_map_lock:
+        try:
+            with open(map_path, 'r', encoding='utf-8') as f:
+                pg_map = json.load(f)
+        except (OSError, ValueError):
+            pg_map = {}
+        pg_map[pg_code] = os.path.basename(file_path)
+        tmp_path = f"{map_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(pg_map, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, map_path)
+
+
+def log_line(message: str):
+    """Print a message with the same timestamp format as the window's console."""
+    print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}", flush=True)
+
+
+def ingest_file(path: str, folder: str) -> bool:
+    """
+    Save one captured page from the inbox, then move it out of the way.
+    
+    Saved files go to a 'processed' subfolder of the inbox and files that could not be
+    read or saved go to 'failed', so they are never picked up twice.
+    
+    Args:
+        path (str): The inbox file to ingest.
+        folder (str): The directory path to save the page in.
+    
+    Returns:
+        bool: True if the page was saved.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            content = f.read().strip()
+    except OSError as e:
+        message = f"Error reading file: {str(e)}"
+    else:
         message = save_html(content, folder)
-        log_message(message)
-        html_text.delete("1.0", tk.END)
+    saved = message.startswith("Saved as: ")
+    log_line(f"{os.path.basename(path)}: {message}")
+    done_dir = os.path.join(os.path.dirname(path), 'processed' if saved else 'failed')
+    try:
+        os.makedirs(done_dir, exist_ok=True)
+        shutil.move(path, os.path.join(done_dir, os.path.basename(path)))
+    except OSError as e:
+        log_line(f"Error moving {path}: {str(e)}")
+    return saved
+
+
+def watch_inbox(inbox: str, folder: str, once: bool = False) -> int:
+    """
+    Save every HTML file dropped into an inbox directory, oldest first.
+    
+    Waiting files are all handled in one scan before the next one starts, so a burst of
+    captures is drained without a pause between pages; the loop only sleeps while the inbox
+    is empty. Files still being written (modified within INBOX_SETTLE_SECONDS) wait for the
+    next scan, and hidden or non-HTML files are ignored.
+    
+    Args:
+        inbox (str): The directory to watch.
+        folder (str): The directory path to save pages in.
+        once (bool): Stop after the files currently waiting instead of watching forever.
+    
+    Returns:
+        int: Exit status, non-zero if any page could not be saved.
+    """
+    os.makedirs(inbox, exist_ok=True)
+    log_line(f"Watching {inbox} for HTML files, saving to {folder}")
+    status = 0
+    while True:
+        now = time.time()
+        waiting = []
+        settling = False
+        with os.scandir(inbox) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.name.lower().endswith(('.html', '.htm')) or not entry.is_file():
+                    continue
+                mtime = entry.stat().st_mtime
+                if now - mtime < INBOX_SETTLE_SECONDS:
+                    settling = True
+                else:
+                    waiting.append((mtime, entry.path))
+        for _, path in sorted(waiting):
+            if not ingest_file(path, folder):
+                status = 1
+        if once and not settling:
+            return status
+        if not waiting:
+            time.sleep(INBOX_SETTLE_SECONDS if settling else INBOX_POLL_SECONDS)
+
+
+def read_documents(stream):
+    """
+    Split a binary stream into UTF-8 documents separated by NUL bytes.
+    
+    Reads with read1(), which returns whatever has arrived instead of waiting for a full
+    chunk, so each document is yielded as soon as its separator arrives and a long-running
+    producer is saved page by page. A NUL byte never occurs inside another UTF-8 character,
+    and the incremental decoder keeps characters split across reads intact.
+    
+    Args:
+        stream: A buffered binary stream such as sys.stdin.buffer.
+    
+    Yields:
+        str: Each document with newlines normalized, stripped of surrounding whitespace.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pending = []
+    while chunk := stream.read1(STREAM_CHUNK_SIZE):
+        *complete, rest = chunk.split(b'\0')
+        for part in complete:
+            pending.append(decoder.decode(part, final=True))
+            decoder.reset()
+            yield ''.join(pending).replace('\r\n', '\n').strip()
+            pending = []
+        pending.append(decoder.decode(rest))
+    pending.append(decoder.decode(b'', final=True))
+    if last := ''.join(pending).replace('\r\n', '\n').strip():
+        yield last
+
+
+def ingest_stdin(folder: str) -> int:
+    """
+    Save the documents read from standard input.
+    
+    A single page can be piped in as is; a capture script streaming several pages
+    separates them with NUL characters.
+    
+    Args:
+        folder (str): The directory path to save pages in.
+    
+    Returns:
+        int: Exit status, non-zero if any document could not be saved.
+    """
+    status = 0
+    for content in read_documents(sys.stdin.buffer):
+        if not content:
+            continue
+        message = save_html(content, folder)
+        log_line(message)
+        if not message.startswith("Saved as: "):
+            status = 1
+    return status
+
+
+class DocumentHandler(socketserver.StreamRequestHandler):
+    """Receive one document per connection, save it and reply with the result message."""
+
+    timeout = SOCKET_TIMEOUT_SECONDS  # A client that never finishes sending cannot hold a thread forever
+
+    def handle(self):
+        chunks = []
+        size = 0
+        try:
+            while chunk := self.rfile.read1(STREAM_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_DOCUMENT_BYTES:
+                    self.wfile.write(b"Error saving file: document too large\n")
+                    return
+                chunks.append(chunk)
+        except TimeoutError:
+            log_line(f"Connection from {self.client_address[0]} timed out before the document was complete")
+            self.wfile.write(b"Error saving file: timed out waiting for the document\n")
+            return
+        content = b''.join(chunks).decode('utf-8', errors='replace').strip()
+        with save_lock:
+            message = save_html(content, self.server.folder)
+        log_line(message)
+        self.wfile.write(message.encode('utf-8') + b"\n")
+
+
+class DocumentServer(socketserver.ThreadingTCPServer):
+    """Local TCP server that saves each received document into a folder."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128  # Room for a burst of captures connecting at once
+
+
+def serve_documents(port: int, folder: str) -> int:
+    """
+    Listen on a local TCP port and save every document sent to it.
+    
+    Each client connects, sends one page, shuts down its side of the connection and reads
+    back the save message. Only connections from this machine are accepted.
+    
+    Args:
+        port (int): The port to listen on (on 127.0.0.1).
+        folder (str): The directory path to save pages in.
+    
+    Returns:
+        int: Exit status.
+    """
+    with DocumentServer(('127.0.0.1', port), DocumentHandler) as server:
+        server.folder = folder
+        log_line(f"Listening on 127.0.0.1:{server.server_address[1]}, saving to {folder}")
+        server.serve_forever()
+    return 0
+
+
+def search_classify(html_content: str) -> tuple:
+    """
+    Classify a page the original way, with one full-document search per pattern.
+    
+    Kept as the baseline for benchmark_classifier and to check that classify_html agrees with it.
+    
+    Args:
+        html_content (str): The HTML string to analyze.
+    
+    Returns:
+        tuple: The unstripped name (or None) and the page type, as classify_html returns them.
+    """
+    name = None
+    for pattern in NAME_PATTERNS:
+        if match := pattern.search(html_content):
+            name = match.group(1)
+            break
+    if re.search(r'class="child w3-card tile"', html_content):
+        return name, "tile"
+    if re.search(r'<table.*class="w3-table w3-striped w3-bordered w3-border"', html_content, re.DOTALL):
+        return name, "list"
+    return name, "text"
+
+
+def make_benchmark_page(kind: str, size: int) -> str:
+    """
+    Build a synthetic captured page of roughly the given size in characters.
+    
+    Args:
+        kind (str): 'tile' (header and card tiles), 'list' (striped tables), 'text' (plain
+            sections with unstyled tables, where every pattern has to look at the whole page) or
+            'bold' (a single tag full of '<b' openers, the worst case for the bold-text pattern).
+        size (int): Approximate length of the page.
+    
+    Returns:
+        str: The HTML document.
+    """
+    if kind == 'tile':
+        head = '<html><head><title>Student Resources</title></head><body><div class="exlheader"><b style="color:#C99700">Student Resources</b></div>'
+        block = '<div class="child w3-card tile"><a href="#"><img src="icon.png"><p>Advising &amp; Counseling</p></a></div>\n'
+    elif kind == 'list':
+        head = '<html><head><title>Library Links</title></head><body><h1>Library Links</h1>'
+        block = '<table class="w3-table w3-striped w3-bordered w3-border"><tr><td><a href="#">Database</a></td></tr></table>\n'
+    elif kind == 'text':
+        head = '<html><head></head><body>'
+        block = '<table><tr><td>' + 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 20 + '</td></tr></table>\n'
+    else:
+        return '<b' + ('xxxxxxxx<b' * max(1, (size - 6) // 10)) + '</b>'
+    return head + block * max(1, (size - len(head)) // len(block)) + '<p><b>Campus Map</b></p></body></html>'
+
+
+def benchmark_classifier(sizes_mb: list) -> int:
+    """
+    Time classify_html against the original per-pattern searches on synthetic multi-megabyte pages.
+    
+    The original searches are quadratic on 'bold' pages, so they only run on those up to
+    BENCHMARK_BASELINE_MAX_BOLD characters; larger ones time classify_html alone.
+    
+    Args:
+        sizes_mb (list): Page sizes to test, in megabytes.
+    
+    Returns:
+        int: Exit status, non-zero if the two classifiers disagree on any page.
+    """
+    status = 0
+    print(f"{'page':<6} {'size':>8} {'searches':>12} {'classify_html':>14}  result")
+    for size_mb in sizes_mb:
+        for kind in ('tile', 'list', 'text', 'bold'):
+            page = make_benchmark_page(kind, int(size_mb * 1024 * 1024))
+            start = time.perf_counter()
+            result = classify_html(page)
+            elapsed = (time.perf_counter() - start) * 1000
+            baseline = "skipped"
+            if kind != 'bold' or len(page) <= BENCHMARK_BASELINE_MAX_BOLD:
+                start = time.perf_counter()
+                expected = search_classify(page)
+                baseline = f"{(time.perf_counter() - start) * 1000:.1f}ms"
+                if result != expected:
+                    print(f"Mismatch on {size_mb} MB {kind} page: {expected} != {result}")
+                    status = 1
+            print(f"{kind:<6} {size_mb:>6g}MB {baseline:>12} {elapsed:>12.1f}ms  {result[1]}, {clean_name(result[0])}")
+    return status
+
+
+def run_gui():
+    """Build the paste window and run the Tk main loop."""
+    # Initialize the main GUI window
+    root = tk.Tk()
+    root.title("HTML Input Collector")
+    root.configure(bg=WHITE)
+
+    # Load and display MCC logo with fallback to text label
+    logo_url = "https://www.monroecc.edu/fileadmin/SiteFiles/GeneralContent/depts/brand-toolkit/images/2015_logos/horizontal_logos/MCC_logo_horiz_color_rgb.png"
+    try:
+        response = requests.get(logo_url, timeout=5)  # Add timeout for better reliability
+        response.raise_for_status()
+        img_data = BytesIO(response.content)
+        img = Image.open(img_data)
+        img = img.resize((300, 75), Image.LANCZOS)
+        photo = ImageTk.PhotoImage(img)
+        logo_label = tk.Label(root, image=photo, bg=WHITE)
+        logo_label.image = photo  # Retain reference to prevent garbage collection
+        logo_label.pack(pady=10)
+    except Exception as e:
+        print(f"Error loading logo: {e}")
+        fallback_label = tk.Label(root, text="Monroe Community College", font=("Arial", 16, "bold"), bg=WHITE, fg=BLACK)
+        fallback_label.pack(pady=10)
+
+    # Set up output folder selection with default path
+    output_folder = tk.StringVar(value=DEFAULT_OUTPUT_FOLDER)
+
+    def choose_folder():
+        """Open a directory selection dialog and update the output folder."""
+        folder = filedialog.askdirectory()
+        if folder:
+            output_folder.set(folder)
+            folder_label.config(text=f"Output Folder: {folder}")
+
+    choose_button = tk.Button(root, text="Choose Folder", command=choose_folder, bg=GOLD, fg=BLACK, activebackground=GRAY, activeforeground=WHITE)
+    choose_button.pack(pady=10)
+
+    folder_label = tk.Label(root, text=f"Output Folder: {output_folder.get()}", bg=WHITE, fg=BLACK, wraplength=600)  # Add wraplength for long paths
+    folder_label.pack()
+
+    # Optional pg_code of the pasted page, recorded so the ADA converter can
+    # find it as a sub-page
+    pg_code_frame = tk.Frame(root, bg=WHITE)
+    pg_code_frame.pack()
+    tk.Label(pg_code_frame, text="pg_code (optional):", bg=WHITE, fg=BLACK).pack(side=tk.LEFT)
+    pg_code_entry = tk.Entry(pg_code_frame, width=20, bg=WHITE, fg=BLACK)
+    pg_code_entry.pack(side=tk.LEFT)
+
+    # Create text widget for HTML input
+    html_text = tk.Text(root, height=15, width=80, wrap='word', bg=WHITE, fg=BLACK)
+    html_text.pack(pady=10)
+
+    # Create console for logging messages
+    console = tk.Text(root, height=10, width=80, state='disabled', wrap='word', bg=GRAY, fg=BLACK)
+    console.pack(pady=10)
+
+    def log_message(message: str):
+        """Log a message to the console widget."""
+        console.config(state='normal')
+        console.insert(tk.END, f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}\n")  # Add timestamp for better logging
+        console.see(tk.END)
+        console.config(state='disabled')
+
+    # Bind paste event to process HTML after a short delay
+    def on_paste(event):
+        root.after(100, process_html)
+
+    def process_html():
+        """Process and save pasted HTML content, then clear the input."""
+        content = html_text.get("1.0", tk.END).strip()
+        if content:
+            folder = output_folder.get()
+            os.makedirs(folder, exist_ok=True)  # Ensure folder exists
+            message = save_html(content, folder, pg_code_entry.get().strip() or None)
+            log_message(message)
+            html_text.delete("1.0", tk.END)
+            pg_code_entry.delete(0, tk.END)
+
+    html_text.bind("<<Paste>>", on_paste)
+    html_text.bind("<Control-v>", on_paste)  # Explicitly bind Ctrl+V for cross-platform reliability
+
+    # Display initial instructions in console
+    log_message("Paste your HTML content into the text box above (e.g., via Ctrl+V). It will be processed and saved automatically.")
 
-html_text.bind("<<Paste>>", on_paste)
-html_text.bind("<Control-v>", on_paste)  # Explicitly bind Ctrl+V for cross-platform reliability
+    # Dynamically resize window to fit content
+    root.update_idletasks()
+    root.geometry(f"{root.winfo_reqwidth() + 20}x{root.winfo_reqheight() + 20}")  # Add padding for aesthetics
 
-# Display initial instructions in console
-log_message("Paste your HTML content into the text box above (e.g., via Ctrl+V). It will be processed and saved automatically.")
+    root.mainloop()
 
-# Dynamically resize window to fit content
-root.update_idletasks()
-root.geometry(f"{root.winfo_reqwidth() + 20}x{root.winfo_reqheight() + 20}")  # Add padding for aesthetics
 
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Save pasted HTML pages under a logical name with their page type.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--watch', metavar='DIR', help="save every HTML file dropped into this inbox directory instead of opening the window")
+    mode.add_argument('--stdin', action='store_true', help="save the documents read from standard input, separated by NUL characters")
+    mode.add_argument('--listen', type=int, metavar='PORT', help="save each document sent to this local TCP port, one per connection")
+    mode.add_argument('--benchmark', nargs='*', type=float, metavar='MB',
+                      help="time the page classifier on synthetic pages of these sizes in megabytes (default: 0.1 1 4) instead of opening the window")
+    parser.add_argument('-o', '--output-folder', default=DEFAULT_OUTPUT_FOLDER, help="folder pages are saved in (default: %(default)s)")
+    parser.add_argument('--once', action='store_true', help="with --watch, stop once the inbox is empty")
+    args = parser.parse_args()
+    if args.benchmark is not None:
+        sys.exit(benchmark_classifier(args.benchmark or [0.1, 1, 4]))
+    if args.watch or args.stdin or args.listen is not None:
+        os.makedirs(args.output_folder, exist_ok=True)
+        try:
+            if args.watch:
+                sys.exit(watch_inbox(args.watch, args.output_folder, args.once))
+            if args.stdin:
+                sys.exit(ingest_stdin(args.output_folder))
+            sys.exit(serve_documents(args.listen, args.output_folder))
+        except KeyboardInterrupt:
+            sys.exit(0)
+    run_gui()